@@ -15,66 +15,402 @@ import sys
 import time
 import json
 import re
+import base64
+import itertools
+import threading
 from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor
+import websocket
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.common.action_chains import ActionChains
 from PIL import Image
+import numpy as np
 import io
 import hashlib
 
 import config
 
 
-def images_similar(img1_data, img2_data, threshold=0.98):
-    """Check if two screenshots are similar (for end detection)."""
-    if img1_data is None or img2_data is None:
-        return False
+# Describe every iframe under arguments[0] (or the whole document) in one round-trip.
+# "index" is the iframe's position in window.frames, usable with switch_to.frame().
+IFRAME_INFO_JS = """
+    var root = arguments[0] || document;
+    var frames = Array.prototype.slice.call(window.frames);
+    return Array.from(root.getElementsByTagName('iframe')).map(function (f) {
+        var r = f.getBoundingClientRect();
+        var style = window.getComputedStyle(f);
+        return {
+            index: frames.indexOf(f.contentWindow),
+            src: f.src || '',
+            cls: f.className || '',
+            favre: f.matches('iframe.favre'),
+            visible: r.width > 0 && r.height > 0 && style.visibility !== 'hidden',
+            width: r.width,
+            height: r.height
+        };
+    }).filter(function (f) { return f.index >= 0; });
+"""
+
+# Scroll metrics of the current frame plus its iframes, for find_scrollable_depth
+FRAME_LEVEL_JS = """
+    var html = document.documentElement;
+    var body = document.body;
+    var iframes = (function () {
+""" + IFRAME_INFO_JS + """
+    })();
+    return {
+        scroll: {
+            htmlScroll: html ? html.scrollHeight : 0,
+            htmlClient: html ? html.clientHeight : 0,
+            bodyScroll: body ? body.scrollHeight : 0,
+            bodyClient: body ? body.clientHeight : 0
+        },
+        iframes: iframes
+    };
+"""
+
+
+# Return [element, selector] for the first visible element taller than 100px,
+# trying the selectors in arguments[0] in order
+FIND_PANEL_JS = """
+    var selectors = arguments[0];
+    for (var i = 0; i < selectors.length; i++) {
+        var els = document.querySelectorAll(selectors[i]);
+        for (var j = 0; j < els.length; j++) {
+            var r = els[j].getBoundingClientRect();
+            if (r.width > 0 && r.height > 100) {
+                return [els[j], selectors[i]];
+            }
+        }
+    }
+    return null;
+"""
+
+
+# Windows virtual key codes for the keys sent through CDP Input.dispatchKeyEvent
+CDP_KEY_CODES = {
+    "PageDown": 34,
+    "ArrowDown": 40,
+    "Home": 36,
+}
+CDP_MODIFIER_CTRL = 2
+
+
+class CdpPipe:
+    """
+    Raw DevTools websocket to one tab.
+    
+    Selenium's execute_cdp_cmd waits for each response before the next command can
+    be sent; here commands are submitted back-to-back and a reader thread resolves
+    each returned Future when the response with its id arrives.
+    """
+    
+    def __init__(self, target_id):
+        url = f"ws://{config.CHROME_DEBUG_HOST}:{config.CHROME_DEBUG_PORT}/devtools/page/{target_id}"
+        # Chrome rejects DevTools websockets that send an Origin header
+        self._ws = websocket.create_connection(url, suppress_origin=True)
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+    
+    def send(self, method, params=None):
+        """Submit a command without waiting; returns a Future for its result."""
+        future = Future()
+        with self._lock:
+            msg_id = next(self._ids)
+            self._pending[msg_id] = future
+            self._ws.send(json.dumps({"id": msg_id, "method": method, "params": params or {}}))
+        return future
+    
+    def close(self):
+        """Close the websocket (pending commands fail)."""
+        try:
+            self._ws.close()
+        except Exception:
+            pass
     
+    def _read_loop(self):
+        while True:
+            try:
+                message = json.loads(self._ws.recv())
+            except Exception as e:
+                with self._lock:
+                    pending, self._pending = self._pending, {}
+                for future in pending.values():
+                    future.set_exception(ConnectionError(f"CDP pipe closed: {e}"))
+                return
+            
+            # Events carry no id; only command responses resolve a Future
+            with self._lock:
+                future = self._pending.pop(message.get("id"), None)
+            if future is None:
+                continue
+            if "error" in message:
+                future.set_exception(RuntimeError(message["error"].get("message", "CDP error")))
+            else:
+                future.set_result(message.get("result", {}))
+
+
+def open_cdp_pipe(driver):
+    """Open a CdpPipe to the driver's current tab, or return None to fall back to Selenium."""
     try:
-        img1 = Image.open(io.BytesIO(img1_data))
-        img2 = Image.open(io.BytesIO(img2_data))
-        
-        # Resize to small thumbnails for fast comparison
-        size = (100, 100)
-        img1_small = img1.resize(size).convert('L')  # Grayscale
-        img2_small = img2.resize(size).convert('L')
-        
-        # Compare pixels
-        pixels1 = list(img1_small.getdata())
-        pixels2 = list(img2_small.getdata())
-        
-        if len(pixels1) != len(pixels2):
-            return False
-        
-        # Calculate similarity
-        matches = sum(1 for p1, p2 in zip(pixels1, pixels2) if abs(p1 - p2) < 10)
-        similarity = matches / len(pixels1)
-        
-        return similarity >= threshold
+        # ChromeDriver window handles are DevTools target ids
+        target_id = driver.current_window_handle.replace("CDwindow-", "")
+        return CdpPipe(target_id)
+    except Exception as e:
+        print(f"  CDP pipe unavailable, using Selenium for CDP commands: {e}")
+        return None
+
+
+def cdp_submit(driver, pipe, method, params):
+    """Submit a CDP command: queued on the pipe if there is one, otherwise run through Selenium."""
+    if pipe is not None:
+        return pipe.send(method, params)
+    
+    future = Future()
+    try:
+        future.set_result(driver.execute_cdp_cmd(method, params))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def press_keys(driver, keys, modifiers=0, pipe=None):
+    """Press and release keys via CDP, bypassing Selenium's action builder."""
+    futures = []
+    for key in keys:
+        params = {
+            "key": key,
+            "code": key,
+            "windowsVirtualKeyCode": CDP_KEY_CODES[key],
+            "nativeVirtualKeyCode": CDP_KEY_CODES[key],
+            "modifiers": modifiers,
+        }
+        for event_type in ("rawKeyDown", "keyUp"):
+            futures.append(cdp_submit(driver, pipe, "Input.dispatchKeyEvent", dict(params, type=event_type)))
+    
+    # All events are in flight at once; collect them together
+    for future in futures:
+        future.result(timeout=config.TIMEOUTS["element_wait"])
+
+
+# The element that actually scrolls in the current frame (html or body), or null
+FIND_SCROLLER_JS = """
+    var scroller = [document.scrollingElement, document.documentElement, document.body]
+        .find(function (e) { return e && e.scrollHeight > e.clientHeight + 100; }) || null;
+"""
+
+# Scroll position of the current frame
+SCROLL_POS_JS = FIND_SCROLLER_JS + """
+    return scroller ? scroller.scrollTop : window.scrollY;
+"""
+
+# Whether the current frame is scrolled to the bottom (false if nothing scrolls)
+AT_END_JS = FIND_SCROLLER_JS + """
+    return !!scroller && scroller.scrollTop + scroller.clientHeight >= scroller.scrollHeight - 2;
+"""
+
+
+def wait_scroll_settled(driver, start_pos, timeout=None, interval=0.03):
+    """
+    Wait until the current frame has scrolled away from start_pos and stopped moving.
+    Gives up after timeout (the configured scroll delay), e.g. when the end is reached.
+    """
+    timeout = timeout or config.TIMEOUTS["scroll_delay"]
+    deadline = time.time() + timeout
+    last_pos = start_pos
+    while time.time() < deadline:
+        time.sleep(interval)
+        pos = driver.execute_script(SCROLL_POS_JS)
+        if pos == last_pos and pos != start_pos:
+            return
+        last_pos = pos
+
+
+def pick_visible_iframe(iframes):
+    """Return the first visible iframe descriptor taller than 50px, or None."""
+    for f in iframes:
+        if f['visible'] and f['height'] > 50:
+            return f
+    return None
+
+
+def save_and_thumb(screenshot_data, filepath, thumbs=None, thumb_index=None):
+    """
+    Write an encoded screenshot to disk and return its grayscale thumbnail as a
+    uint8 array (None if undecodable). If a thumbnail array is given, the
+    thumbnail is also stored in it.
+    """
+    # Chrome already encoded the screenshot; write its bytes as-is
+    with open(filepath, 'wb') as f:
+        f.write(screenshot_data)
+    
+    try:
+        img = Image.open(io.BytesIO(screenshot_data))
+        # JPEG can decode straight to grayscale at a reduced scale
+        img.draft('L', THUMB_SIZE)
+        thumb = np.asarray(img.convert('L').resize(THUMB_SIZE, Image.Resampling.BILINEAR, reducing_gap=2.0))
+        if thumbs is not None and thumb_index is not None:
+            thumbs[thumb_index] = thumb
+            thumbs.flush()
+        return thumb
     except Exception:
+        return None
+
+
+def images_similar(thumb1, thumb2, threshold=0.98):
+    """Check if two screenshot thumbnails are similar (for end detection)."""
+    if thumb1 is None or thumb2 is None or thumb1.shape != thumb2.shape:
         return False
+    
+    # Share of pixels that differ by less than 10 grey levels
+    diff = np.abs(thumb1.astype(np.int16) - thumb2.astype(np.int16))
+    return np.count_nonzero(diff < 10) / diff.size >= threshold
 from pdf_generator import create_ocr_pdf
 
 
-# Session file to track captures
-SESSION_FILE = os.path.join(config.OUTPUT_FOLDER, "capture_session.json")
+# The e-book's main content panel, and fallbacks in priority order
+MAIN_PANEL_SELECTOR = "#main-panel, [id='main-panel']"
+PANEL_SELECTORS = [
+    "#main-panel",
+    '[id="main-panel"]',
+    'div[data-panel-group-id="0"]',
+    '#main-content',
+    '[role="main"]',
+]
+
+
+# Session files to track captures: an append-only log with one screenshot
+# entry per line, plus a small header recording when the session started
+SESSION_FILE = os.path.join(config.OUTPUT_FOLDER, "capture_session.jsonl")
+SESSION_HEADER_FILE = os.path.join(config.OUTPUT_FOLDER, "capture_session_header.json")
+
+# Single-JSON session file written by older versions; imported on first load
+LEGACY_SESSION_FILE = os.path.join(config.OUTPUT_FOLDER, "capture_session.json")
+
+# Grayscale thumbnails of every captured screenshot, stored contiguously in a
+# memory-mapped array; session entries refer to their row by "thumb" index
+THUMBS_FILE = os.path.join(config.OUTPUT_FOLDER, "capture_thumbs.dat")
+THUMB_SIZE = (100, 100)
+
+# Safety limit on screenshots per page
+MAX_SCREENSHOTS = 50
+
+# The thumbnail file grows in steps of this many rows (about 5 MB), as the session does
+THUMB_CHUNK_ROWS = 500
+
+# File extension for the configured screenshot format
+SCREENSHOT_EXT = "jpg" if config.SCREENSHOT_SETTINGS["format"] == "jpeg" else "png"
 
 
 def load_session():
     """Load existing capture session or create new one."""
+    if not os.path.exists(SESSION_FILE) and os.path.exists(LEGACY_SESSION_FILE):
+        migrate_legacy_session()
+    
+    started = None
+    if os.path.exists(SESSION_HEADER_FILE):
+        with open(SESSION_HEADER_FILE, 'r') as f:
+            started = json.load(f).get("started")
+    
+    screenshots = []
     if os.path.exists(SESSION_FILE):
-        with open(SESSION_FILE, 'r') as f:
-            return json.load(f)
-    return {"screenshots": [], "started": datetime.now().isoformat()}
+        with open(SESSION_FILE, 'rb') as f:
+            lines = f.readlines()
+        good_end = 0
+        for n, line in enumerate(lines):
+            if line.strip():
+                try:
+                    screenshots.append(json.loads(line))
+                except ValueError:
+                    if n == len(lines) - 1:
+                        # Torn write from a crash mid-append: cut it off so the
+                        # next append starts on a clean line
+                        print("Dropping incomplete last entry of the capture session")
+                        with open(SESSION_FILE, 'r+b') as f:
+                            f.truncate(good_end)
+                        break
+                    print(f"Skipping unreadable capture session entry on line {n + 1}")
+            good_end += len(line)
+        else:
+            if lines and not lines[-1].endswith(b'\n'):
+                # Complete entry but its newline didn't make it to disk
+                with open(SESSION_FILE, 'ab') as f:
+                    f.write(b'\n')
+    
+    return {"screenshots": screenshots, "started": started or datetime.now().isoformat()}
 
 
-def save_session(session):
-    """Save capture session."""
-    with open(SESSION_FILE, 'w') as f:
-        json.dump(session, f, indent=2)
+def migrate_legacy_session():
+    """Convert a capture_session.json from older versions into the session log, once."""
+    try:
+        with open(LEGACY_SESSION_FILE, 'r') as f:
+            legacy = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Could not read old capture session {LEGACY_SESSION_FILE}: {e}")
+        return
+    
+    tmp_path = SESSION_FILE + ".tmp"
+    with open(tmp_path, 'w') as f:
+        for entry in legacy.get("screenshots", []):
+            f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+    if legacy.get("started"):
+        with open(SESSION_HEADER_FILE, 'w') as f:
+            json.dump({"started": legacy["started"]}, f)
+    os.replace(tmp_path, SESSION_FILE)
+    
+    # Keep the old file around, but out of the way so this runs only once
+    os.replace(LEGACY_SESSION_FILE, LEGACY_SESSION_FILE + ".migrated")
+    print(f"Imported {len(legacy.get('screenshots', []))} screenshots from the old capture session")
+
+
+def append_session(session, entries):
+    """Append new screenshot entries to the capture session log."""
+    if not os.path.exists(SESSION_HEADER_FILE):
+        with open(SESSION_HEADER_FILE, 'w') as f:
+            json.dump({"started": session["started"]}, f)
+    
+    with open(SESSION_FILE, 'a') as f:
+        for entry in entries:
+            f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+    
+    session["screenshots"].extend(entries)
+
+
+def open_thumbs(rows_needed):
+    """
+    Open (or create) the memory-mapped thumbnail array for the session, first
+    growing the file in THUMB_CHUNK_ROWS steps until it has rows_needed rows.
+    """
+    row_bytes = THUMB_SIZE[0] * THUMB_SIZE[1]
+    rows = -(-rows_needed // THUMB_CHUNK_ROWS) * THUMB_CHUNK_ROWS
+    size = os.path.getsize(THUMBS_FILE) if os.path.exists(THUMBS_FILE) else 0
+    if size < rows * row_bytes:
+        with open(THUMBS_FILE, 'ab') as f:
+            f.truncate(rows * row_bytes)
+    else:
+        rows = size // row_bytes
+    return np.memmap(THUMBS_FILE, dtype=np.uint8, mode='r+',
+                     shape=(rows, THUMB_SIZE[1], THUMB_SIZE[0]))
+
+
+# Characters not allowed in screenshot file names (anything but \w, \s and -),
+# as a regex and, for ASCII titles, as a str.translate table
+_NAME_RE = re.compile(r'[^\w\s-]')
+_NAME_DROP_TABLE = {
+    c: None for c in range(128)
+    if not (chr(c).isalnum() or chr(c).isspace() or chr(c) in '_-')
+}
+
+
+def clean_title(title):
+    """Strip characters that are unsafe in file names from a page title."""
+    if title.isascii():
+        return title.translate(_NAME_DROP_TABLE)
+    return _NAME_RE.sub('', title)
 
 
 def connect_to_browser():
@@ -94,8 +430,36 @@ def connect_to_browser():
         return None
 
 
-def capture_current_page(driver):
-    """Capture screenshot of the main content panel only, handling nested iframes."""
+def capture_screenshot(driver, element=None, pipe=None):
+    """
+    Screenshot the page (or just an element) via Chrome DevTools Protocol.
+    
+    Chrome encodes only the clipped region, in the configured screenshot format,
+    instead of Selenium's full-page PNG that is then cropped to the element.
+    """
+    fmt = config.SCREENSHOT_SETTINGS["format"]
+    params = {"format": fmt, "captureBeyondViewport": False}
+    if fmt == "jpeg":
+        params["quality"] = config.SCREENSHOT_SETTINGS["quality"]
+    
+    if element is not None:
+        x, y, width, height = driver.execute_script("""
+            var r = arguments[0].getBoundingClientRect();
+            return [r.x + window.scrollX, r.y + window.scrollY, r.width, r.height];
+        """, element)
+        params["clip"] = {"x": x, "y": y, "width": width, "height": height, "scale": 1}
+    
+    result = cdp_submit(driver, pipe, "Page.captureScreenshot", params).result(
+        timeout=config.TIMEOUTS["element_wait"]
+    )
+    return base64.b64decode(result["data"])
+
+
+def capture_current_page(driver, thumbs=None, first_thumb=0):
+    """
+    Capture screenshot of the main content panel only, handling nested iframes.
+    Thumbnails are stored in thumbs starting at row first_thumb.
+    """
     print("Capturing main content panel...")
     
     # Get page info
@@ -103,7 +467,7 @@ def capture_current_page(driver):
     url = driver.current_url
     
     # Extract a clean name from title or URL
-    clean_name = re.sub(r'[^\w\s-]', '', title)[:40].strip()
+    clean_name = clean_title(title)[:40].strip()
     if not clean_name:
         clean_name = "page"
     
@@ -112,26 +476,14 @@ def capture_current_page(driver):
     
     # Find the main content panel
     main_panel = None
-    panel_selectors = [
-        "#main-panel",
-        '[id="main-panel"]',
-        'div[data-panel-group-id="0"]',
-        '#main-content',
-        '[role="main"]',
-    ]
-    
-    for selector in panel_selectors:
-        try:
-            elements = driver.find_elements(By.CSS_SELECTOR, selector)
-            for el in elements:
-                if el.is_displayed() and el.size['height'] > 100:
-                    main_panel = el
-                    print(f"  Found content panel: {selector}")
-                    break
-            if main_panel:
-                break
-        except Exception:
-            continue
+    # Pick the first visible match, in selector priority order, in one round-trip
+    try:
+        found = driver.execute_script(FIND_PANEL_JS, PANEL_SELECTORS)
+        if found:
+            main_panel, selector = found
+            print(f"  Found content panel: {selector}")
+    except Exception:
+        pass
     
     if not main_panel:
         print("  Warning: Could not find #main-panel, using full page")
@@ -142,80 +494,64 @@ def capture_current_page(driver):
     # Stop when we find scrollable content
     
     def find_scrollable_depth():
-        """Enter iframes one by one, checking for scrollable content at each level."""
-        depth = 0
+        """
+        Enter iframes one by one, checking for scrollable content at each level.
+        Returns the chain of frame indices that leads to the scrollable content.
+        """
+        frame_chain = []
         max_depth = 4
         
-        while depth < max_depth:
-            # Check if current level has scrollable content
+        while len(frame_chain) < max_depth:
+            depth = len(frame_chain)
+            # Read scroll metrics and all iframes of this level in one round-trip
             try:
-                check_scroll = driver.execute_script("""
-                    var html = document.documentElement;
-                    var body = document.body;
-                    return {
-                        htmlScroll: html ? html.scrollHeight : 0,
-                        htmlClient: html ? html.clientHeight : 0,
-                        bodyScroll: body ? body.scrollHeight : 0,
-                        bodyClient: body ? body.clientHeight : 0
-                    };
-                """)
-                print(f"    Level {depth}: html={check_scroll['htmlScroll']}/{check_scroll['htmlClient']}, body={check_scroll['bodyScroll']}/{check_scroll['bodyClient']}")
-                
-                # If scrollHeight > clientHeight + some threshold, we found scrollable content
-                if check_scroll['htmlScroll'] > check_scroll['htmlClient'] + 100:
-                    print(f"  Found scrollable content at level {depth}!")
-                    return depth
-                if check_scroll['bodyScroll'] > check_scroll['bodyClient'] + 100:
-                    print(f"  Found scrollable content at level {depth}!")
-                    return depth
+                level = driver.execute_script(FRAME_LEVEL_JS)
             except Exception as e:
                 print(f"    Level {depth}: error checking scroll - {e}")
+                break
+            
+            check_scroll = level['scroll']
+            print(f"    Level {depth}: html={check_scroll['htmlScroll']}/{check_scroll['htmlClient']}, body={check_scroll['bodyScroll']}/{check_scroll['bodyClient']}")
+            
+            # If scrollHeight > clientHeight + some threshold, we found scrollable content
+            if check_scroll['htmlScroll'] > check_scroll['htmlClient'] + 100:
+                print(f"  Found scrollable content at level {depth}!")
+                return frame_chain
+            if check_scroll['bodyScroll'] > check_scroll['bodyClient'] + 100:
+                print(f"  Found scrollable content at level {depth}!")
+                return frame_chain
             
             # Try to go deeper
+            iframes = level['iframes']
+            if not iframes:
+                print(f"  No more iframes at level {depth}")
+                break
+            
+            # Look for iframe.favre specifically, otherwise enter any visible iframe
+            target = next(
+                (f for f in iframes if f['favre'] and f['visible']),
+                None
+            )
+            label = "iframe.favre"
+            if target is None:
+                target = pick_visible_iframe(iframes)
+                label = "iframe"
+            if target is None:
+                break
+            
             try:
-                iframes = driver.find_elements(By.TAG_NAME, "iframe")
-                if not iframes:
-                    print(f"  No more iframes at level {depth}")
-                    break
-                
-                entered = False
-                
-                # Look for iframe.favre specifically
-                for iframe in iframes:
-                    try:
-                        iframe_class = iframe.get_attribute('class') or ''
-                        if 'favre' in iframe_class.lower() and iframe.is_displayed():
-                            driver.switch_to.frame(iframe)
-                            depth += 1
-                            print(f"  Entered iframe.favre (level {depth})")
-                            entered = True
-                            break
-                    except Exception:
-                        continue
-                
-                # Otherwise enter any visible iframe
-                if not entered:
-                    for iframe in iframes:
-                        try:
-                            if iframe.is_displayed() and iframe.size['height'] > 50:
-                                driver.switch_to.frame(iframe)
-                                depth += 1
-                                print(f"  Entered iframe (level {depth})")
-                                entered = True
-                                break
-                        except Exception:
-                            continue
-                
-                if not entered:
-                    break
+                driver.switch_to.frame(target['index'])
             except Exception:
                 break
+            frame_chain.append(target['index'])
+            print(f"  Entered {label} (level {depth + 1})")
         
-        return depth
+        return frame_chain
     
-    # Find the level with scrollable content
-    iframe_depth = find_scrollable_depth()
-    print(f"  Final iframe depth: {iframe_depth}")
+    # Find the level with scrollable content; remember the path so the
+    # scroll loop can re-enter it without looking the iframes up again
+    frame_chain = find_scrollable_depth()
+    print(f"  Final iframe depth: {len(frame_chain)}")
     
     # Get viewport height
     try:
@@ -230,108 +566,145 @@ def capture_current_page(driver):
     # Use keyboard scrolling (Page Down) which works even with shadow DOM
     # Compare screenshots to detect when content stops changing
     
-    max_screenshots = 50  # Safety limit
     screenshot_num = 0
     
+    # Screenshots and key events go over a raw DevTools websocket when possible
+    pipe = open_cdp_pipe(driver)
+    
     # First, try to scroll to top using Home key
     driver.switch_to.default_content()
+    scroll_panel = None
     try:
-        # Click on main panel to focus it
-        main_panel = driver.find_element(By.CSS_SELECTOR, "#main-panel, [id='main-panel']")
-        main_panel.click()
+        # Click on main panel to focus it (the handle is reused for every screenshot)
+        scroll_panel = driver.find_element(By.CSS_SELECTOR, MAIN_PANEL_SELECTOR)
+        scroll_panel.click()
         time.sleep(0.2)
         
         # Send Ctrl+Home to go to top
-        actions = ActionChains(driver)
-        actions.key_down(Keys.CONTROL).send_keys(Keys.HOME).key_up(Keys.CONTROL).perform()
+        press_keys(driver, ["Home"], CDP_MODIFIER_CTRL, pipe)
         time.sleep(0.5)
     except Exception as e:
         print(f"  Could not scroll to top: {e}")
     
     print(f"  Using keyboard scroll mode (Page Down)...")
     
-    prev_screenshot_data = None
+    prev_thumb = None
+    prev_digest = None
+    at_end = False
     
-    while screenshot_num < max_screenshots:
+    # Saving and thumbnailing frame N runs in the background while Chrome scrolls
+    # to frame N+1; only one frame is ever in flight
+    pool = ThreadPoolExecutor(max_workers=1)
+    
+    while screenshot_num < MAX_SCREENSHOTS:
         # Take screenshot of main panel
         driver.switch_to.default_content()
         
         try:
-            main_panel = driver.find_element(By.CSS_SELECTOR, "#main-panel, [id='main-panel']")
-            screenshot_data = main_panel.screenshot_as_png
-            img = Image.open(io.BytesIO(screenshot_data))
+            screenshot_data = capture_screenshot(driver, scroll_panel, pipe)
         except Exception as e:
             print(f"    Screenshot error: {e}")
-            screenshot_data = driver.get_screenshot_as_png()
-            img = Image.open(io.BytesIO(screenshot_data))
+            screenshot_data = capture_screenshot(driver, pipe=pipe)
         
-        # Check if this screenshot is very similar to the previous one (end of content)
-        if prev_screenshot_data is not None and images_similar(prev_screenshot_data, screenshot_data):
+        # Byte-identical to the previous frame: Page Down no longer moves the content
+        cur_digest = hashlib.blake2b(screenshot_data, digest_size=16).hexdigest()
+        if cur_digest == prev_digest:
             print(f"  Reached end of content after {screenshot_num} screenshots")
             break
         
         # Save screenshot
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
-        filename = f"{timestamp}_{clean_name}_{screenshot_num+1:03d}.png"
+        filename = f"{timestamp}_{clean_name}_{screenshot_num+1:03d}.{SCREENSHOT_EXT}"
         filepath = os.path.join(config.SCREENSHOT_FOLDER, filename)
-        img.save(filepath)
+        thumb_index = first_thumb + screenshot_num
+        if thumbs is None or thumb_index >= thumbs.shape[0]:
+            thumb_index = None
+        pending = pool.submit(save_and_thumb, screenshot_data, filepath, thumbs, thumb_index)
+        
+        # Scroll down using Page Down, unless the DOM reported the bottom on the
+        # previous scroll (this is then the final screenshot)
+        final_frame = at_end
+        scroll_error = None
+        if not final_frame:
+            try:
+                # Switch to the innermost iframe where scroll happens
+                for index in frame_chain:
+                    driver.switch_to.frame(index)
+                
+                # Send Page Down + 1 Arrow Down WITHOUT clicking (to avoid clicking images)
+                start_pos = driver.execute_script(SCROLL_POS_JS)
+                press_keys(driver, ["PageDown", "ArrowDown"], pipe=pipe)
+                wait_scroll_settled(driver, start_pos)
+                at_end = driver.execute_script(AT_END_JS)
+                
+                # Return to default content for next screenshot
+                driver.switch_to.default_content()
+                
+            except Exception as e:
+                scroll_error = e
+                driver.switch_to.default_content()
+        
+        # Check if this screenshot is very similar to the previous one (end of content)
+        cur_thumb = pending.result()
+        if images_similar(prev_thumb, cur_thumb):
+            print(f"  Reached end of content after {screenshot_num} screenshots")
+            try:
+                os.remove(filepath)
+            except OSError:
+                pass
+            break
         
         screenshots.append({
             "path": filepath,
             "title": title,
             "url": url,
             "index": screenshot_num,
+            "thumb": thumb_index,
+            "digest": cur_digest,
             "captured": datetime.now().isoformat()
         })
         
         print(f"  [{screenshot_num+1}] Saved")
         screenshot_num += 1
-        prev_screenshot_data = screenshot_data
+        prev_thumb = cur_thumb
+        prev_digest = cur_digest
         
-        # Scroll down using Page Down
-        try:
-            # Switch to the innermost iframe where scroll happens
-            main_panel = driver.find_element(By.CSS_SELECTOR, "#main-panel, [id='main-panel']")
-            
-            # Enter iframes to get to the content
-            for _ in range(iframe_depth):
-                iframes = driver.find_elements(By.TAG_NAME, "iframe")
-                for iframe in iframes:
-                    try:
-                        if iframe.is_displayed() and iframe.size['height'] > 50:
-                            driver.switch_to.frame(iframe)
-                            break
-                    except:
-                        continue
-            
-            # Send Page Down + 1 Arrow Down WITHOUT clicking (to avoid clicking images)
-            actions = ActionChains(driver)
-            actions.send_keys(Keys.PAGE_DOWN)
-            actions.send_keys(Keys.ARROW_DOWN)
-            actions.perform()
-            time.sleep(0.5)
-            
-            # Return to default content for next screenshot
-            driver.switch_to.default_content()
-            
-        except Exception as e:
-            print(f"    Scroll error: {e}")
-            driver.switch_to.default_content()
+        if final_frame:
+            print(f"  Reached end of content after {screenshot_num} screenshots")
+            break
+        
+        if scroll_error is not None:
+            print(f"    Scroll error: {scroll_error}")
             break
     
+    pool.shutdown()
+    
     # Scroll back to top
     try:
         driver.switch_to.default_content()
-        main_panel = driver.find_element(By.CSS_SELECTOR, "#main-panel, [id='main-panel']")
-        main_panel.click()
-        actions = ActionChains(driver)
-        actions.key_down(Keys.CONTROL).send_keys(Keys.HOME).key_up(Keys.CONTROL).perform()
+        scroll_panel.click()
+        press_keys(driver, ["Home"], CDP_MODIFIER_CTRL, pipe)
     except Exception:
         pass
     
+    if pipe is not None:
+        pipe.close()
+    
     return screenshots
 
 
+def existing_paths(paths):
+    """Return the set of paths that exist on disk, listing each folder once instead of a stat per file."""
+    existing = set()
+    for folder in {os.path.dirname(p) for p in paths}:
+        try:
+            with os.scandir(folder) as entries:
+                existing.update(os.path.join(folder, entry.name) for entry in entries)
+        except OSError:
+            continue
+    return existing
+
+
 def generate_pdf(session):
     """Generate PDF from all captured screenshots."""
     if not session["screenshots"]:
@@ -340,8 +713,23 @@ def generate_pdf(session):
     
     print(f"\nGenerating PDF from {len(session['screenshots'])} screenshots...")
     
-    # Get all screenshot paths in order
-    paths = [s["path"] for s in session["screenshots"] if os.path.exists(s["path"])]
+    # Get all screenshot paths in order, skipping byte-identical repeats of the previous page
+    paths = []
+    prev_hash = None
+    skipped = 0
+    existing = existing_paths([s["path"] for s in session["screenshots"]])
+    for s in session["screenshots"]:
+        if s["path"] not in existing:
+            continue
+        page_hash = s.get("digest")
+        if page_hash is not None and page_hash == prev_hash:
+            skipped += 1
+            continue
+        paths.append(s["path"])
+        prev_hash = page_hash
+    
+    if skipped:
+        print(f"Skipped {skipped} duplicate screenshots")
     
     if not paths:
         print("No screenshot files found!")
@@ -364,8 +752,9 @@ def generate_pdf(session):
 
 def clear_session():
     """Clear the capture session."""
-    if os.path.exists(SESSION_FILE):
-        os.remove(SESSION_FILE)
+    for path in (SESSION_FILE, SESSION_HEADER_FILE, THUMBS_FILE):
+        if os.path.exists(path):
+            os.remove(path)
     print("Session cleared.")
 
 
@@ -427,11 +816,17 @@ def main():
     
     try:
         # Capture the page
-        new_screenshots = capture_current_page(driver)
+        # Next free thumbnail row: the session can have gaps (skipped or torn
+        # entries), so continue after the highest row still referenced
+        first_thumb = max(
+            (e["thumb"] for e in session["screenshots"] if e.get("thumb") is not None),
+            default=-1,
+        ) + 1
+        thumbs = open_thumbs(first_thumb + MAX_SCREENSHOTS)
+        new_screenshots = capture_current_page(driver, thumbs, first_thumb)
         
         # Add to session
-        session["screenshots"].extend(new_screenshots)
-        save_session(session)
+        append_session(session, new_screenshots)
         
         total = len(session["screenshots"])
         print(f"\n✓ Captured! Total screenshots: {total}")
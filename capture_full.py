@@ -27,6 +27,30 @@ import config
 from pdf_generator import create_ocr_pdf
 
 
+# Describe every iframe under arguments[0] (or the whole document) in one round-trip.
+# "index" is the iframe's position in window.frames, usable with switch_to.frame().
+IFRAME_INFO_JS = """
+    var root = arguments[0] || document;
+    var frames = Array.prototype.slice.call(window.frames);
+    return Array.from(root.getElementsByTagName('iframe')).map(function (f) {
+        var r = f.getBoundingClientRect();
+        var style = window.getComputedStyle(f);
+        return {
+            index: frames.indexOf(f.contentWindow),
+            src: f.src || '',
+            cls: f.className || '',
+            visible: r.width > 0 && r.height > 0 && style.visibility !== 'hidden',
+            width: r.width,
+            height: r.height
+        };
+    }).filter(function (f) { return f.index >= 0; });
+"""
+
+
+# The e-book's main content panel
+MAIN_PANEL_SELECTOR = "#main-panel, [id='main-panel']"
+
+
 # Session file to track captures
 SESSION_FILE = os.path.join(config.OUTPUT_FOLDER, "capture_full_session.json")
 
@@ -42,7 +66,23 @@ def load_session():
 def save_session(session):
     """Save capture session."""
     with open(SESSION_FILE, 'w') as f:
-        json.dump(session, f, indent=2)
+        json.dump(session, f, separators=(',', ':'))
+
+
+# Characters not allowed in screenshot file names (anything but \w, \s and -),
+# as a regex and, for ASCII titles, as a str.translate table
+_NAME_RE = re.compile(r'[^\w\s-]')
+_NAME_DROP_TABLE = {
+    c: None for c in range(128)
+    if not (chr(c).isalnum() or chr(c).isspace() or chr(c) in '_-')
+}
+
+
+def clean_title(title):
+    """Strip characters that are unsafe in file names from a page title."""
+    if title.isascii():
+        return title.translate(_NAME_DROP_TABLE)
+    return _NAME_RE.sub('', title)
 
 
 def connect_to_browser():
@@ -71,7 +111,7 @@ def capture_full_page(driver):
     original_url = driver.current_url
     
     # Extract a clean name from title
-    clean_name = re.sub(r'[^\w\s-]', '', title)[:40].strip()
+    clean_name = clean_title(title)[:40].strip()
     if not clean_name:
         clean_name = "page"
     
@@ -80,36 +120,36 @@ def capture_full_page(driver):
     # Find the iframe with the actual e-book content and get its src
     iframe_src = None
     try:
-        main_panel = driver.find_element(By.CSS_SELECTOR, "#main-panel, [id='main-panel']")
+        main_panel = driver.find_element(By.CSS_SELECTOR, MAIN_PANEL_SELECTOR)
         print(f"  Found main panel")
         
         # Find iframes and get their src URLs - go deep to find content
-        iframes = main_panel.find_elements(By.TAG_NAME, "iframe")
+        iframes = driver.execute_script(IFRAME_INFO_JS, main_panel)
         for iframe in iframes:
-            if iframe.is_displayed() and iframe.size['height'] > 50:
-                src = iframe.get_attribute('src')
+            if iframe['visible'] and iframe['height'] > 50:
+                src = iframe['src']
                 print(f"  L1 iframe: {src[:70]}..." if src and len(src) > 70 else f"  L1 iframe: {src}")
                 
                 # Enter first iframe
-                driver.switch_to.frame(iframe)
+                driver.switch_to.frame(iframe['index'])
                 
                 # Look for nested iframes
-                level2_iframes = driver.find_elements(By.TAG_NAME, "iframe")
+                level2_iframes = driver.execute_script(IFRAME_INFO_JS)
                 for l2_iframe in level2_iframes:
-                    if l2_iframe.is_displayed() and l2_iframe.size['height'] > 50:
-                        l2_src = l2_iframe.get_attribute('src')
-                        l2_class = l2_iframe.get_attribute('class') or ''
+                    if l2_iframe['visible'] and l2_iframe['height'] > 50:
+                        l2_src = l2_iframe['src']
+                        l2_class = l2_iframe['cls']
                         print(f"  L2 iframe ({l2_class[:20]}): {l2_src[:60]}..." if l2_src and len(l2_src) > 60 else f"  L2 iframe: {l2_src}")
                         
                         # Enter second iframe
-                        driver.switch_to.frame(l2_iframe)
+                        driver.switch_to.frame(l2_iframe['index'])
                         
                         # Check for level 3 iframes (the actual content)
-                        level3_iframes = driver.find_elements(By.TAG_NAME, "iframe")
+                        level3_iframes = driver.execute_script(IFRAME_INFO_JS)
                         for l3_iframe in level3_iframes:
-                            if l3_iframe.is_displayed():
-                                l3_src = l3_iframe.get_attribute('src')
-                                l3_class = l3_iframe.get_attribute('class') or ''
+                            if l3_iframe['visible']:
+                                l3_src = l3_iframe['src']
+                                l3_class = l3_iframe['cls']
                                 print(f"  L3 iframe ({l3_class[:20]}): {l3_src[:60]}..." if l3_src and len(l3_src) > 60 else f"  L3 iframe: {l3_src}")
                                 
                                 # Look for jigsaw or content URLs
@@ -203,6 +243,18 @@ def capture_full_page(driver):
     return screenshots
 
 
+def existing_paths(paths):
+    """Return the set of paths that exist on disk, listing each folder once instead of a stat per file."""
+    existing = set()
+    for folder in {os.path.dirname(p) for p in paths}:
+        try:
+            with os.scandir(folder) as entries:
+                existing.update(os.path.join(folder, entry.name) for entry in entries)
+        except OSError:
+            continue
+    return existing
+
+
 def generate_pdf(session):
     """Generate PDF from all captured screenshots."""
     if not session["screenshots"]:
@@ -212,7 +264,8 @@ def generate_pdf(session):
     print(f"\nGenerating PDF from {len(session['screenshots'])} screenshots...")
     
     # Get all screenshot paths in order
-    paths = [s["path"] for s in session["screenshots"] if os.path.exists(s["path"])]
+    existing = existing_paths([s["path"] for s in session["screenshots"]])
+    paths = [s["path"] for s in session["screenshots"] if s["path"] in existing]
     
     if not paths:
         print("No screenshot files found!")
@@ -47,12 +47,29 @@ TIMEOUTS = {
     "after_click": 2,
     "scroll_delay": 0.5,
     "screenshot_delay": 0.3,
+    "poll_max": 1.5,  # longest interval between checks while waiting for the page
+}
+
+# Number of browser tabs used to load upcoming sections while one is captured.
+# 1 (the default) clicks through the sections in the current tab; more tabs load
+# each section as a full page in its own tab, and the current tab is returned
+# to its page afterwards
+PARALLEL_TABS = 1
+
+# Launch a new Chrome when none is listening on the debug port (instead of failing).
+# Images stay on (they are what gets captured); GPU, extensions and /dev/shm are off,
+# and navigations return at DOMContentLoaded ("eager"). Use "user_data_dir" to keep
+# the login between runs.
+LAUNCH_MODE = False
+LAUNCH_SETTINGS = {
+    "window_size": (1280, 1600),
+    "user_data_dir": None,
 }
 
 # Screenshot settings
 SCREENSHOT_SETTINGS = {
-    "format": "png",
-    "quality": 95,  # For JPEG format
+    "format": "jpeg",  # "jpeg" or "png"
+    "quality": 85,  # For JPEG format
 }
 
 # PDF settings
@@ -60,6 +77,9 @@ PDF_SETTINGS = {
     "page_size": "A4",
     "margin": 20,  # pixels
     "dpi": 150,
+    "ocr_downscale": 1,  # OCR at 1/N resolution; 2 suits HiDPI (2x) screenshots, 1 disables
+    "jpeg_quality": 85,  # quality of the stitched image in seamless PDFs
+    "batch_pages": 0,  # per-page (non-seamless) PDFs: append every N pages to the file to cap memory; 0 disables
 }
 
 # Ensure output directories exist
@@ -4,13 +4,51 @@ PDF Generator with OCR Text Layer
 Creates searchable PDFs from screenshots by adding an invisible OCR text layer.
 """
 import os
+import io
+import hashlib
+import multiprocessing
+from multiprocessing import shared_memory
+import struct
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 import fitz  # PyMuPDF
+import numpy as np
 import pytesseract
-from PIL import Image
+from PIL import Image, ImageOps
 from datetime import datetime
 
 import config
 
+# Optional: tesserocr drives Tesseract in-process, keeping the model loaded across images
+try:
+    from tesserocr import PyTessBaseAPI, PSM, RIL, iterate_level
+except ImportError:
+    PyTessBaseAPI = None
+
+
+# Number of images OCR'd by one Tesseract process
+OCR_BATCH_SIZE = 4
+
+# Per-process tesserocr engine, created on first use; set to False if it can't be
+# created (e.g. no language data found), and OCR then goes through pytesseract
+_tess_api = None
+
+# Output is mostly already-compressed images: only drop unreferenced objects
+# (no full garbage/merge pass) and deflate just the streams that are still raw
+PDF_SAVE_OPTIONS = dict(
+    garbage=1,
+    deflate=True,
+    deflate_images=False,
+    deflate_fonts=True,
+    clean=False,
+    linear=False,
+)
+
+# OCR results by SHA-1 of the image file, oldest evicted first
+OCR_CACHE_SIZE = 512
+_ocr_cache = {}
+
 
 def setup_tesseract():
     """Configure Tesseract OCR path if specified in config."""
@@ -29,41 +67,378 @@ def get_ocr_text(image_path):
         return ""
 
 
+def filter_ocr_data(data, scale_x=1.0, scale_y=1.0):
+    """
+    Turn Tesseract's column-wise image_to_data output into a list of
+    dictionaries with text, position, and confidence, dropping empty and
+    low-confidence boxes. Boxes are multiplied by scale_x/scale_y to map a
+    downscaled OCR image back to the original pixels.
+    """
+    if not data['text']:
+        return []
+    
+    text = np.char.strip(np.asarray(data['text'], dtype=str))
+    # conf arrives as int, float or numeric string depending on the OCR path
+    conf = np.asarray(data['conf'], dtype=np.float64).astype(np.int32)
+    
+    # Only include text with reasonable confidence
+    keep = np.flatnonzero((conf > 30) & (np.char.str_len(text) > 0))
+    
+    columns = zip(
+        text[keep].tolist(),
+        (np.asarray(data['left'], dtype=np.float64)[keep] * scale_x).astype(np.int32).tolist(),
+        (np.asarray(data['top'], dtype=np.float64)[keep] * scale_y).astype(np.int32).tolist(),
+        (np.asarray(data['width'], dtype=np.float64)[keep] * scale_x).astype(np.int32).tolist(),
+        (np.asarray(data['height'], dtype=np.float64)[keep] * scale_y).astype(np.int32).tolist(),
+        conf[keep].tolist(),
+    )
+    return [
+        {'text': t, 'x': x, 'y': y, 'width': w, 'height': h, 'conf': c}
+        for t, x, y, w, h, c in columns
+    ]
+
+
+def _open_image(path):
+    """Open an image from a single read of its file instead of PIL's chunked reads."""
+    with open(path, 'rb') as f:
+        return Image.open(io.BytesIO(f.read()))
+
+
+def _prepare_for_ocr(img):
+    """
+    Convert an image to autocontrasted grayscale and downscale it by
+    PDF_SETTINGS["ocr_downscale"] for OCR.
+    
+    JPEGs are converted and scaled by the decoder itself (draft mode) when
+    the image has not been loaded yet. Returns (image, scale_x, scale_y),
+    where the scales map OCR coordinates back to the original image.
+    """
+    factor = config.PDF_SETTINGS.get("ocr_downscale", 1) or 1
+    width, height = img.size
+    target = (int(width // factor), int(height // factor))
+    if factor <= 1 or target[0] < 1 or target[1] < 1:
+        target = (width, height)
+    
+    if img.format == 'JPEG':
+        img.draft('L', target)
+    img = ImageOps.grayscale(img)
+    if img.width > target[0] + 1 or img.height > target[1] + 1:
+        img = img.resize(target, Image.BILINEAR)
+    img = ImageOps.autocontrast(img)
+    
+    return img, width / img.width, height / img.height
+
+
+def _tessdata_path():
+    """
+    Language data folder for tesserocr: None when TESSDATA_PREFIX is set (Tesseract
+    reads it itself), else the tessdata folder next to config.TESSERACT_PATH if any.
+    """
+    if os.environ.get("TESSDATA_PREFIX") or not config.TESSERACT_PATH:
+        return None
+    path = os.path.join(os.path.dirname(config.TESSERACT_PATH), "tessdata")
+    return path if os.path.isdir(path) else None
+
+
+def _tess_engine():
+    """The per-process tesserocr engine, or None if it is not installed or failed to start."""
+    global _tess_api
+    if _tess_api is None:
+        if PyTessBaseAPI is None:
+            _tess_api = False
+        else:
+            try:
+                path = _tessdata_path()
+                if path:
+                    _tess_api = PyTessBaseAPI(path=path, psm=PSM.AUTO)
+                else:
+                    _tess_api = PyTessBaseAPI(psm=PSM.AUTO)
+            except Exception as e:
+                print(f"    tesserocr unavailable, using the tesseract executable instead: {e}")
+                _tess_api = False
+    return None if _tess_api is False else _tess_api
+
+
+def _tesserocr_data(api, img):
+    """
+    Run OCR through the resident tesserocr engine and return word boxes in
+    the same column layout as pytesseract.image_to_data(..., Output.DICT).
+    """
+    data = {'text': [], 'conf': [], 'left': [], 'top': [], 'width': [], 'height': []}
+    api.SetImage(img)
+    api.Recognize()
+    for word in iterate_level(api.GetIterator(), RIL.WORD):
+        box = word.BoundingBox(RIL.WORD)
+        if box is None:
+            continue
+        x1, y1, x2, y2 = box
+        data['text'].append(word.GetUTF8Text(RIL.WORD) or '')
+        data['conf'].append(word.Confidence(RIL.WORD))
+        data['left'].append(x1)
+        data['top'].append(y1)
+        data['width'].append(x2 - x1)
+        data['height'].append(y2 - y1)
+    return data
+
+
 def get_ocr_data(image_path):
     """
     Get detailed OCR data including bounding boxes for text positioning.
+    Accepts a file path or an already-loaded PIL Image.
     Returns a list of dictionaries with text, position, and confidence.
     """
     try:
-        img = Image.open(image_path)
+        img = image_path if isinstance(image_path, Image.Image) else _open_image(image_path)
+        # OCR a reduced grayscale copy; the PDF page keeps the full-resolution image
+        img, scale_x, scale_y = _prepare_for_ocr(img)
         # Get detailed OCR output with bounding boxes
-        data = pytesseract.image_to_data(img, output_type=pytesseract.Output.DICT)
-        
-        results = []
-        n_boxes = len(data['text'])
-        
-        for i in range(n_boxes):
-            text = data['text'][i].strip()
-            conf = int(data['conf'][i])
-            
-            # Only include text with reasonable confidence
-            if text and conf > 30:
-                results.append({
-                    'text': text,
-                    'x': data['left'][i],
-                    'y': data['top'][i],
-                    'width': data['width'][i],
-                    'height': data['height'][i],
-                    'conf': conf,
-                })
-        
-        return results
+        api = _tess_engine()
+        if api is not None:
+            data = _tesserocr_data(api, img)
+        else:
+            data = pytesseract.image_to_data(img, output_type=pytesseract.Output.DICT)
+        return filter_ocr_data(data, scale_x, scale_y)
     except Exception as e:
         print(f"    OCR data extraction warning: {e}")
         return []
 
 
-def create_ocr_pdf(image_paths, output_path, title="E-book Chapter", seamless=True):
+def get_ocr_data_batch(image_paths):
+    """
+    Get OCR data for several images from a single Tesseract process.
+    
+    Tesseract reads the images from a list file, so the engine and language
+    model are initialised once per batch instead of once per image. Items
+    may be file paths or PIL Images. Returns one get_ocr_data()-style list
+    per image, in order.
+    
+    With tesserocr installed the engine is already resident in this process,
+    so images are simply recognised one after another.
+    """
+    if len(image_paths) <= 1 or _tess_engine() is not None:
+        return [get_ocr_data(image_path) for image_path in image_paths]
+    
+    scales = [(1.0, 1.0)] * len(image_paths)
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # Tesseract reads files, so the prepared (grayscale, downscaled) copies are written out
+            ocr_paths = []
+            for i, image_path in enumerate(image_paths):
+                img = image_path if isinstance(image_path, Image.Image) else _open_image(image_path)
+                small, scale_x, scale_y = _prepare_for_ocr(img)
+                ocr_paths.append(os.path.join(tmp_dir, f"{i}.png"))
+                small.save(ocr_paths[i], 'PNG', compress_level=1)
+                scales[i] = (scale_x, scale_y)
+            
+            list_path = os.path.join(tmp_dir, "images.txt")
+            with open(list_path, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(ocr_paths) + '\n')
+            proc = subprocess.run(
+                [pytesseract.pytesseract.tesseract_cmd, list_path, 'stdout', 'tsv'],
+                capture_output=True, check=True,
+            )
+    except Exception as e:
+        print(f"    Batch OCR warning, falling back to one image at a time: {e}")
+        return [get_ocr_data(image_path) for image_path in image_paths]
+    
+    # The TSV covers all images; page_num (1-based) says which image a row belongs to
+    lines = proc.stdout.decode('utf-8', errors='replace').splitlines()
+    if not lines:
+        return [[] for _ in image_paths]
+    header = lines[0].split('\t')
+    pages = [{column: [] for column in header} for _ in image_paths]
+    
+    for line in lines[1:]:
+        fields = line.split('\t')
+        if fields[0] == 'level' or len(fields) < len(header) - 1:
+            continue
+        # Rows without text may drop the trailing empty column
+        fields += [''] * (len(header) - len(fields))
+        row = dict(zip(header, fields))
+        page = int(row['page_num']) - 1
+        if 0 <= page < len(pages):
+            for column in header:
+                pages[page][column].append(row[column])
+    
+    return [
+        filter_ocr_data(data, scale_x, scale_y)
+        for data, (scale_x, scale_y) in zip(pages, scales)
+    ]
+
+
+def _ocr_uncached(image_paths):
+    """
+    Yield get_ocr_data() results for each image, in order.
+    
+    Tesseract is single-threaded per call, so batches of images are spread
+    across a process pool (one Tesseract process per batch); results stream
+    back in submission order while the caller builds PDF pages on the main
+    process.
+    """
+    if len(image_paths) <= 1:
+        for image_path in image_paths:
+            yield get_ocr_data(image_path)
+        return
+    
+    batches = [
+        image_paths[i:i + OCR_BATCH_SIZE]
+        for i in range(0, len(image_paths), OCR_BATCH_SIZE)
+    ]
+    with multiprocessing.Pool(processes=os.cpu_count(), initializer=setup_tesseract) as pool:
+        for batch_results in pool.imap(get_ocr_data_batch, batches):
+            for ocr_data in batch_results:
+                yield ocr_data
+
+
+def _file_digest(path):
+    """SHA-1 of a file's bytes, or None if it cannot be read."""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).digest()
+    except OSError:
+        return None
+
+
+def _ocr_shared_regions(task):
+    """
+    Pool worker: OCR rectangular regions of an RGB canvas held in shared memory.
+    
+    task is (shm_name, shape, regions) with regions as (y0, y1, x0, x1);
+    boxes are returned relative to each region, so results can be cached
+    and reused wherever the same stripe lands on a canvas.
+    """
+    name, shape, regions = task
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        arr = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        # Copy each region out so nothing references the segment once it is closed
+        images = [Image.fromarray(arr[y0:y1, x0:x1].copy()) for y0, y1, x0, x1 in regions]
+        del arr
+    finally:
+        shm.close()
+    
+    return get_ocr_data_batch(images)
+
+
+def _ocr_shared_uncached(shm_name, shape, regions):
+    """Yield _ocr_shared_regions() results per region, in order, using the process pool."""
+    if len(regions) <= 1:
+        if regions:
+            yield _ocr_shared_regions((shm_name, shape, regions))[0]
+        return
+    
+    batches = [
+        (shm_name, shape, regions[i:i + OCR_BATCH_SIZE])
+        for i in range(0, len(regions), OCR_BATCH_SIZE)
+    ]
+    with multiprocessing.Pool(processes=os.cpu_count(), initializer=setup_tesseract) as pool:
+        for batch_results in pool.imap(_ocr_shared_regions, batches):
+            for ocr_data in batch_results:
+                yield ocr_data
+
+
+def _ocr_deduped(keys, tasks, run):
+    """
+    Yield one OCR result per task, in order, running only uncached tasks.
+    
+    keys identify each task's content (None = always run); results for keys
+    seen in this call or an earlier one are reused, and run(todo) must yield
+    results for the remaining tasks in order.
+    """
+    # Results known up front; held here so cache eviction can't drop them mid-run
+    known = {key: _ocr_cache[key] for key in keys if key is not None and key in _ocr_cache}
+    todo = []
+    queued = set()
+    for task, key in zip(tasks, keys):
+        if key is not None and (key in known or key in queued):
+            continue
+        if key is not None:
+            queued.add(key)
+        todo.append(task)
+    
+    results = run(todo)
+    for key in keys:
+        if key is not None and key in known:
+            yield known[key]
+            continue
+        # Not seen yet, so this is the next task the workers were given
+        ocr_data = next(results)
+        if key is not None:
+            known[key] = ocr_data
+            _ocr_cache[key] = ocr_data
+            if len(_ocr_cache) > OCR_CACHE_SIZE:
+                del _ocr_cache[next(iter(_ocr_cache))]
+        yield ocr_data
+
+
+def ocr_images(image_paths):
+    """
+    Yield get_ocr_data() results for each image, in order.
+    
+    Images are keyed by content hash: byte-identical screenshots, within
+    this call or from an earlier one, reuse the cached result, and only
+    the first copy of each is sent to the OCR workers.
+    """
+    keys = [_file_digest(path) for path in image_paths]
+    return _ocr_deduped(keys, image_paths, _ocr_uncached)
+
+
+def insert_text_layer(page, ocr_data, scale_x, scale_y, font=None):
+    """
+    Add OCR words to a page as invisible (render_mode=3) but selectable text.
+    
+    Positions and font sizes for all words are computed in one pass as
+    arrays, and the words are collected in a TextWriter so the page gets a
+    single text block instead of one insert per word.
+    """
+    if font is None:
+        font = fitz.Font("helv")  # pass a shared font when writing several pages
+    
+    boxes = np.array([(item['x'], item['y'], item['height']) for item in ocr_data], dtype=np.float64)
+    h = boxes[:, 2] * scale_y
+    xs = (boxes[:, 0] * scale_x).tolist()
+    # Position: y needs adjustment for baseline
+    ys = (boxes[:, 1] * scale_y + h * 0.8).tolist()
+    # Font size to match the text height
+    fs = np.clip(h * 0.9, 6, 14).tolist()
+    
+    tw = fitz.TextWriter(page.rect)
+    for i, item in enumerate(ocr_data):
+        try:
+            tw.append(fitz.Point(xs[i], ys[i]), item['text'], font=font, fontsize=fs[i])
+        except Exception:
+            continue
+    
+    tw.write_text(page, render_mode=3)  # 3 = invisible (for OCR layer)
+
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def _png_size(path):
+    """
+    Read an image's (width, height) without decoding it.
+    
+    Accepts a file path or the file's bytes. PNGs are probed from the IHDR
+    chunk in the first 24 bytes; other formats fall back to PIL, which only
+    parses the header until pixels are accessed.
+    """
+    if isinstance(path, bytes):
+        data, source = path[:24], io.BytesIO(path)
+    else:
+        data, source = b'', path
+        try:
+            with open(path, 'rb') as f:
+                data = f.read(24)
+        except OSError:
+            pass
+    if len(data) == 24 and data[:8] == _PNG_SIGNATURE:
+        return struct.unpack('>II', data[16:24])
+    with Image.open(source) as img:
+        return img.size
+
+
+def create_ocr_pdf(image_paths, output_path, title="E-book Chapter", seamless=True, ocr_results=None):
     """
     Create an OCR-enabled PDF from a list of screenshot images.
     
@@ -75,6 +450,8 @@ def create_ocr_pdf(image_paths, output_path, title="E-book Chapter", seamless=Tr
         output_path: Path for the output PDF file
         title: Title for the PDF metadata
         seamless: If True, stitch all images into one continuous page
+        ocr_results: Optional get_ocr_data() results per image, already
+            computed (e.g. while scraping); skips the OCR pass
     """
     setup_tesseract()
     
@@ -82,41 +459,60 @@ def create_ocr_pdf(image_paths, output_path, title="E-book Chapter", seamless=Tr
     print(f"Processing {len(image_paths)} images...")
     
     if seamless and len(image_paths) > 1:
-        return create_seamless_ocr_pdf(image_paths, output_path, title)
+        return create_seamless_ocr_pdf(image_paths, output_path, title, ocr_results)
     
     # Create new PDF document (one page per image)
     doc = fitz.open()
     
     # Set metadata
-    doc.set_metadata({
+    metadata = {
         "title": title,
         "author": "E-book Scraper",
         "subject": "Scraped e-book chapter",
         "creator": "E-book Chapter Scraper",
         "creationDate": datetime.now().strftime("D:%Y%m%d%H%M%S"),
-    })
+    }
+    doc.set_metadata(metadata)
     
-    for idx, image_path in enumerate(image_paths):
+    # With batch_pages set, every batch_pages pages are appended to the output file
+    # (incremental save) and dropped, so only one batch of page images is in memory
+    batch_pages = config.PDF_SETTINGS.get("batch_pages", 0)
+    flushed = False
+    
+    # One font object for the whole document, so Helvetica is embedded once
+    font = fitz.Font("helv")
+    
+    # (width, height) in pixels -> (width_pt, height_pt, page rect)
+    dpi = config.PDF_SETTINGS.get("dpi", 96)
+    page_dims = {}
+    
+    # OCR runs ahead in worker processes; pages are built here as results arrive
+    if ocr_results is None:
+        ocr_results = ocr_images(image_paths)
+    
+    for idx, (image_path, ocr_data) in enumerate(zip(image_paths, ocr_results)):
         print(f"  [{idx + 1}/{len(image_paths)}] Processing {os.path.basename(image_path)}")
         
         try:
-            # Open image to get dimensions
-            img = Image.open(image_path)
-            img_width, img_height = img.size
+            # Read the file once; MuPDF embeds these bytes instead of reopening it
+            with open(image_path, 'rb') as f:
+                image_data = f.read()
             
-            # Create a new page with image dimensions
-            dpi = config.PDF_SETTINGS.get("dpi", 96)
-            width_pt = img_width * 72 / dpi
-            height_pt = img_height * 72 / dpi
+            # Read image dimensions from the file header
+            img_width, img_height = _png_size(image_data)
+            
+            # Create a new page with image dimensions; screenshots mostly share one size
+            dims = page_dims.get((img_width, img_height))
+            if dims is None:
+                width_pt = img_width * 72 / dpi
+                height_pt = img_height * 72 / dpi
+                dims = page_dims[(img_width, img_height)] = (width_pt, height_pt, fitz.Rect(0, 0, width_pt, height_pt))
+            width_pt, height_pt, rect = dims
             
             page = doc.new_page(width=width_pt, height=height_pt)
             
             # Insert the image to fill the page
-            rect = fitz.Rect(0, 0, width_pt, height_pt)
-            page.insert_image(rect, filename=image_path)
-            
-            # Get OCR data with positions
-            ocr_data = get_ocr_data(image_path)
+            page.insert_image(rect, stream=image_data)
             
             if ocr_data:
                 # Scale factors from image pixels to PDF points
@@ -125,29 +521,7 @@ def create_ocr_pdf(image_paths, output_path, title="E-book Chapter", seamless=Tr
                 
                 # Add invisible text layer using proper PDF text rendering
                 # We'll use render_mode=3 which makes text invisible but selectable
-                for item in ocr_data:
-                    try:
-                        # Calculate position in PDF coordinates
-                        x = item['x'] * scale_x
-                        y = item['y'] * scale_y
-                        h = item['height'] * scale_y
-                        
-                        # Calculate font size to match the text height
-                        font_size = max(6, min(h * 0.9, 14))
-                        
-                        # Position: y needs adjustment for baseline
-                        text_point = fitz.Point(x, y + h * 0.8)
-                        
-                        # Insert text with render_mode=3 (invisible)
-                        page.insert_text(
-                            text_point,
-                            item['text'],
-                            fontsize=font_size,
-                            fontname="helv",
-                            render_mode=3,  # 3 = invisible (for OCR layer)
-                        )
-                    except Exception:
-                        continue
+                insert_text_layer(page, ocr_data, scale_x, scale_y, font)
                 
                 print(f"    Added {len(ocr_data)} OCR text elements")
             else:
@@ -156,10 +530,26 @@ def create_ocr_pdf(image_paths, output_path, title="E-book Chapter", seamless=Tr
         except Exception as e:
             print(f"    Error processing image: {e}")
             continue
+        
+        if batch_pages and doc.page_count >= batch_pages:
+            try:
+                _append_batch(doc, output_path, flushed)
+            except Exception as e:
+                # Keep the pages; the save is retried after the next page is added
+                print(f"    Error writing pages to the PDF, retrying with the next page: {e}")
+            else:
+                flushed = True
+                doc.close()
+                doc = fitz.open()
     
     # Save the PDF with text layer
     try:
-        doc.save(output_path, garbage=4, deflate=True)
+        if flushed:
+            # Earlier batches are already in the file; append the rest
+            if doc.page_count:
+                _append_batch(doc, output_path, flushed)
+        else:
+            doc.save(output_path, **PDF_SAVE_OPTIONS)
         doc.close()
         
         file_size = os.path.getsize(output_path)
@@ -173,17 +563,48 @@ def create_ocr_pdf(image_paths, output_path, title="E-book Chapter", seamless=Tr
         return False
 
 
-def create_seamless_ocr_pdf(image_paths, output_path, title="E-book Chapter"):
+def _append_batch(doc, output_path, append):
+    """
+    Write a batch of pages to output_path: as a new file for the first batch,
+    then appended with an incremental save, so earlier pages aren't reloaded.
+    """
+    if not append:
+        doc.save(output_path, **PDF_SAVE_OPTIONS)
+        return
+    out = fitz.open(output_path)
+    try:
+        out.insert_pdf(doc)
+        out.saveIncr()
+    finally:
+        out.close()
+
+
+# JPEG can't encode images taller than 65535 rows
+JPEG_MAX_ROWS = 65500
+
+
+def _encode_jpeg(arr):
+    """Encode an RGB pixel array as JPEG bytes at PDF_SETTINGS["jpeg_quality"]."""
+    buf = io.BytesIO()
+    Image.fromarray(arr).save(buf, 'JPEG', quality=config.PDF_SETTINGS.get("jpeg_quality", 85))
+    return buf.getvalue()
+
+
+def create_seamless_ocr_pdf(image_paths, output_path, title="E-book Chapter", ocr_results=None):
     """
     Create a seamless PDF by stitching all images into one continuous page.
     Crops repeated header/footer from screenshots to create truly seamless output.
+    If ocr_results (one get_ocr_data() list per image) is given, those words are
+    mapped onto the stitched page instead of running OCR on the stripes.
     """
     setup_tesseract()
     
     print(f"  Stitching {len(image_paths)} images into seamless PDF...")
     
-    # Load all images and crop headers/footers for seamless stitching
-    images = []
+    # First pass: read sizes only and work out the crop for each image.
+    # Pixels are decoded later, one image at a time, straight into the canvas.
+    stripes = []
+    stripe_ocr = []
     total_height = 0
     max_width = 0
     
@@ -194,11 +615,11 @@ def create_seamless_ocr_pdf(image_paths, output_path, title="E-book Chapter"):
     
     for idx, path in enumerate(image_paths):
         try:
-            img = Image.open(path)
+            width, height = _png_size(path)
             
             # Determine crop for this image
             top = 0
-            bottom = img.height
+            bottom = height
             
             # Crop top from all except first image
             if idx > 0:
@@ -206,38 +627,83 @@ def create_seamless_ocr_pdf(image_paths, output_path, title="E-book Chapter"):
             
             # Crop bottom from all except last image
             if idx < len(image_paths) - 1:
-                bottom = img.height - crop_bottom
+                bottom = height - crop_bottom
             
-            # Apply crop if needed
-            if top > 0 or bottom < img.height:
-                img = img.crop((0, top, img.width, bottom))
+            if bottom <= top:
+                continue
             
-            images.append(img)
-            total_height += img.height
-            max_width = max(max_width, img.width)
+            stripes.append((path, top, bottom, width))
+            if ocr_results is not None:
+                stripe_ocr.append(ocr_results[idx])
+            total_height += bottom - top
+            max_width = max(max_width, width)
         except Exception as e:
             print(f"    Error loading {path}: {e}")
     
-    if not images:
+    if not stripes:
         print("  No images to process!")
         return False
     
     print(f"  Combined size: {max_width} x {total_height} pixels")
     
-    # Create combined image
-    combined = Image.new('RGB', (max_width, total_height), (255, 255, 255))
-    y_offset = 0
-    
-    for img in images:
-        # Center image if narrower than max width
-        x_offset = (max_width - img.width) // 2
-        combined.paste(img, (x_offset, y_offset))
-        y_offset += img.height
-    
-    # Save combined image temporarily
-    temp_combined_path = output_path.replace('.pdf', '_combined.png')
-    combined.save(temp_combined_path, 'PNG')
-    print(f"  Combined image saved temporarily")
+    # Create combined image: each stripe is copied into a white canvas with one slice assignment.
+    # Slicing the decoded array is a view, so no cropped copy is made. The canvas lives in
+    # shared memory so the OCR workers can read the decoded stripes without re-reading files.
+    shm = shared_memory.SharedMemory(create=True, size=total_height * max_width * 3)
+    try:
+        arr = np.ndarray((total_height, max_width, 3), dtype=np.uint8, buffer=shm.buf)
+        arr[:] = 255
+        y_offset = 0
+        regions = []
+        keys = []
+        ocr_data = []
+        
+        for n, (path, top, bottom, width) in enumerate(stripes):
+            try:
+                with _open_image(path) as img:
+                    if img.mode != 'RGB':
+                        img = img.convert('RGB')
+                    a = np.asarray(img)[top:bottom]
+            except Exception as e:
+                print(f"    Error loading {path}: {e}")
+                a = None
+            if a is not None:
+                # Center image if narrower than max width
+                x_offset = (max_width - a.shape[1]) // 2
+                arr[y_offset:y_offset + a.shape[0], x_offset:x_offset + a.shape[1]] = a
+                if ocr_results is not None:
+                    # Keep words whose middle falls inside the kept (uncropped) rows
+                    for item in stripe_ocr[n]:
+                        if top <= item['y'] + item['height'] / 2 < bottom:
+                            ocr_data.append(dict(item, x=item['x'] + x_offset, y=item['y'] - top + y_offset))
+                else:
+                    regions.append((y_offset, y_offset + a.shape[0], x_offset, x_offset + a.shape[1]))
+                    # Same screenshot with the same crop gives the same stripe
+                    digest = _file_digest(path)
+                    keys.append((digest, top, bottom) if digest is not None else None)
+            y_offset += bottom - top
+        
+        if ocr_results is None:
+            # OCR each kept stripe in the worker pool, straight from the shared canvas
+            print(f"  Running OCR on {len(regions)} stripes...")
+            run = lambda todo: _ocr_shared_uncached(shm.name, arr.shape, todo)
+            for region_ocr, (y0, y1, x0, x1) in zip(_ocr_deduped(keys, regions, run), regions):
+                # Results are stripe-local (and may be cached); place them on this canvas
+                ocr_data.extend(dict(item, x=item['x'] + x0, y=item['y'] + y0) for item in region_ocr)
+        
+        return _write_seamless_pdf(arr, ocr_data, output_path, title)
+    finally:
+        arr = None
+        try:
+            shm.close()
+        except BufferError:
+            pass  # a view is still referenced (e.g. by a traceback); freed when that goes
+        shm.unlink()
+
+
+def _write_seamless_pdf(arr, ocr_data, output_path, title):
+    """Write the stitched canvas and its OCR words as one tall PDF page."""
+    total_height, max_width = arr.shape[:2]
     
     # Create PDF with the combined image
     doc = fitz.open()
@@ -258,48 +724,31 @@ def create_seamless_ocr_pdf(image_paths, output_path, title="E-book Chapter"):
     print(f"  Creating PDF page: {width_pt:.0f} x {height_pt:.0f} points")
     
     page = doc.new_page(width=width_pt, height=height_pt)
-    rect = fitz.Rect(0, 0, width_pt, height_pt)
-    page.insert_image(rect, filename=temp_combined_path)
     
-    # OCR the combined image
-    print(f"  Running OCR on combined image...")
-    ocr_data = get_ocr_data(temp_combined_path)
+    # Embed the stitched pixels as JPEG bands, which MuPDF stores as-is (DCTDecode)
+    # instead of deflating one huge raw pixmap. JPEG caps height at 65535 rows, so
+    # tall chapters become several bands stacked on the page; bands encode in parallel.
+    bands = [(y, min(y + JPEG_MAX_ROWS, total_height)) for y in range(0, total_height, JPEG_MAX_ROWS)]
+    with ThreadPoolExecutor(max_workers=min(len(bands), os.cpu_count() or 1)) as pool:
+        encoded = pool.map(lambda band: _encode_jpeg(arr[band[0]:band[1]]), bands)
+        for (y0, y1), jpeg_data in zip(bands, encoded):
+            band_rect = fitz.Rect(0, y0 * 72 / dpi, width_pt, y1 * 72 / dpi)
+            page.insert_image(band_rect, stream=jpeg_data)
+    arr = None
     
     if ocr_data:
         scale_x = width_pt / max_width
         scale_y = height_pt / total_height
         
-        for item in ocr_data:
-            try:
-                x = item['x'] * scale_x
-                y = item['y'] * scale_y
-                h = item['height'] * scale_y
-                font_size = max(6, min(h * 0.9, 14))
-                text_point = fitz.Point(x, y + h * 0.8)
-                
-                page.insert_text(
-                    text_point,
-                    item['text'],
-                    fontsize=font_size,
-                    fontname="helv",
-                    render_mode=3,
-                )
-            except Exception:
-                continue
+        insert_text_layer(page, ocr_data, scale_x, scale_y)
         
         print(f"  Added {len(ocr_data)} OCR text elements")
     
     # Save PDF
     try:
-        doc.save(output_path, garbage=4, deflate=True)
+        doc.save(output_path, **PDF_SAVE_OPTIONS)
         doc.close()
         
-        # Clean up temp file
-        try:
-            os.remove(temp_combined_path)
-        except:
-            pass
-        
         file_size = os.path.getsize(output_path)
         print(f"\nSeamless PDF saved: {output_path}")
         print(f"File size: {file_size / 1024 / 1024:.2f} MB")
@@ -335,8 +784,9 @@ def create_simple_pdf(image_paths, output_path, title="E-book Chapter"):
         print(f"  [{idx + 1}/{len(image_paths)}] Adding {os.path.basename(image_path)}")
         
         try:
-            img = Image.open(image_path)
-            img_width, img_height = img.size
+            with open(image_path, 'rb') as f:
+                image_data = f.read()
+            img_width, img_height = _png_size(image_data)
             
             dpi = config.PDF_SETTINGS.get("dpi", 96)
             width_pt = img_width * 72 / dpi
@@ -344,14 +794,14 @@ def create_simple_pdf(image_paths, output_path, title="E-book Chapter"):
             
             page = doc.new_page(width=width_pt, height=height_pt)
             rect = fitz.Rect(0, 0, width_pt, height_pt)
-            page.insert_image(rect, filename=image_path)
+            page.insert_image(rect, stream=image_data)
             
         except Exception as e:
             print(f"    Error: {e}")
             continue
     
     try:
-        doc.save(output_path, garbage=4, deflate=True)
+        doc.save(output_path, **PDF_SAVE_OPTIONS)
         doc.close()
         print(f"\nPDF saved: {output_path}")
         return True
@@ -366,13 +816,16 @@ if __name__ == "__main__":
     import glob
     
     screenshot_dir = config.SCREENSHOT_FOLDER
-    images = sorted(glob.glob(os.path.join(screenshot_dir, "*.png")))
+    images = sorted(
+        glob.glob(os.path.join(screenshot_dir, "*.png"))
+        + glob.glob(os.path.join(screenshot_dir, "*.jpg"))
+    )
     
     if images:
         print(f"Found {len(images)} screenshots")
         output_file = os.path.join(config.OUTPUT_FOLDER, "test_output.pdf")
         create_ocr_pdf(images, output_file, "Test Chapter")
     else:
-        print(f"No PNG images found in {screenshot_dir}")
+        print(f"No PNG or JPEG images found in {screenshot_dir}")
         print("Run scraper.py first to capture screenshots")
 
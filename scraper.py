@@ -8,22 +8,299 @@ import os
 import re
 import time
 import json
+import base64
+import itertools
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import (
     TimeoutException,
     NoSuchElementException,
     StaleElementReferenceException,
+    JavascriptException,
 )
-from PIL import Image
-import io
 
 import config
-from pdf_generator import create_ocr_pdf
+from pdf_generator import create_ocr_pdf, get_ocr_data_batch, setup_tesseract
+
+
+# Section link titles start with a section number like "4.1"
+_SECTION_RE = re.compile(r'^\d+\.\d+')
+
+# Characters not allowed in screenshot and PDF file names
+_SAFE_NAME_RE = re.compile(r'[^\w\s-]')
+
+# True once every <img> currently inside the viewport has finished loading
+# (off-screen lazy images are ignored, they may never load on their own)
+IMAGES_READY_EXPR = """
+    Array.from(document.images).every(function (img) {
+        if (img.complete) return true;
+        var r = img.getBoundingClientRect();
+        return r.bottom < 0 || r.top > window.innerHeight;
+    })
+"""
+
+# Once the scroll container arguments[0] (or the window, for null) has scrolled to
+# arguments[1] (or as far as it can) and its images are in, return the scroll
+# metrics {y, max}; false until then
+SCROLL_READY_JS = """
+    var el = arguments[0] || document.scrollingElement;
+    var maxY = Math.max(0, el.scrollHeight - el.clientHeight);
+    if (Math.abs(el.scrollTop - Math.min(arguments[1], maxY)) > 2) return false;
+    if (!(""" + IMAGES_READY_EXPR + """)) return false;
+    return {y: el.scrollTop, max: maxY};
+"""
+
+# Scroll the container itself (so IntersectionObserver-driven lazy content fires),
+# wait two animation frames for layout and paint, then check/measure in the same
+# round-trip. The timer only matters if frames are throttled (background tab).
+SCROLL_TO_JS = """
+    var args = arguments;
+    (args[0] || document.scrollingElement).scrollTop = args[1];
+    return new Promise(function (resolve) {
+        var settled = false;
+        var finish = function () {
+            if (settled) return;
+            settled = true;
+            resolve((function () {""" + SCROLL_READY_JS + """}).apply(null, args));
+        };
+        requestAnimationFrame(function () { requestAnimationFrame(finish); });
+        setTimeout(finish, 250);
+    });
+"""
+
+# Candidate containers for the section content, most specific first
+CONTENT_SELECTORS = [
+    '[class*="EbookContent"]',
+    '[class*="ebook-content"]',
+    '[class*="PageContent"]',
+    '[class*="page-content"]',
+    'main',
+    'article',
+    '[role="main"]',
+    '.content',
+]
+
+# findContent(selectors): first visible element taller than 100px for the
+# selectors, tried in order, or null. Shared by the scripts below.
+FIND_CONTENT_FN = """
+    function findContent(selectors) {
+        for (var i = 0; i < selectors.length; i++) {
+            var elements = document.querySelectorAll(selectors[i]);
+            for (var j = 0; j < elements.length; j++) {
+                var el = elements[j];
+                if (el.offsetParent !== null && el.getBoundingClientRect().height > 100) return el;
+            }
+        }
+        return null;
+    }
+"""
+
+# The content area for the selectors in arguments[0]
+FIND_CONTENT_JS = FIND_CONTENT_FN + "return findContent(arguments[0]);"
+
+# Scroll size of the content area, or of the window when no element is given.
+# "inner" is set when the element scrolls on its own rather than with the window.
+CONTENT_METRICS_JS = """
+    var el = arguments[0];
+    if (el) {
+        var overflow = window.getComputedStyle(el).overflowY;
+        return {
+            h: el.scrollHeight,
+            vh: el.clientHeight,
+            inner: el.scrollHeight > el.clientHeight + 1 && (overflow === 'auto' || overflow === 'scroll')
+        };
+    }
+    return {h: document.body.scrollHeight, vh: window.innerHeight, inner: false};
+"""
+
+# Promise for Runtime.evaluate that resolves true as soon as the predicate holds,
+# re-checked on DOM mutations, readyState changes and load events (including images),
+# or false after the timeout
+CDP_WAIT_JS = """
+    new Promise(function (resolve) {
+        var check = function () {
+            try { return !!(%(predicate)s); } catch (e) { return false; }
+        };
+        if (check()) { resolve(true); return; }
+        var onEvent = function () { if (check()) done(true); };
+        var done = function (value) {
+            clearTimeout(timer);
+            observer.disconnect();
+            document.removeEventListener('readystatechange', onEvent);
+            window.removeEventListener('load', onEvent, true);
+            resolve(value);
+        };
+        var timer = setTimeout(function () { done(false); }, %(timeout_ms)d);
+        var observer = new MutationObserver(onEvent);
+        observer.observe(document, {subtree: true, childList: true, attributes: true});
+        document.addEventListener('readystatechange', onEvent);
+        window.addEventListener('load', onEvent, true);
+    })
+"""
+
+# Start loading arguments[0] in this tab without blocking the WebDriver command on it;
+# the flag only exists in the old document, so it marks the navigation as pending
+TAB_LOAD_JS = """
+    window.__scraperPending = true;
+    var href = arguments[0];
+    setTimeout(function () { window.location.href = href; }, 0);
+"""
+
+# True once the tab has replaced the old document with the new one and it has loaded
+TAB_LOADED_JS = "return !window.__scraperPending && document.readyState === 'complete';"
+
+# Before a one-shot full-page capture: switch lazy images to eager, step the window
+# through the document once so IntersectionObserver-driven content loads, return
+# to the top, then wait (at most arguments[0] ms) for every image to decode
+LOAD_LAZY_CONTENT_JS = """
+    var timeoutMs = arguments[0];
+    Array.from(document.images).forEach(function (img) {
+        if (img.loading === 'lazy') img.loading = 'eager';
+    });
+    return new Promise(function (resolve) {
+        var step = window.innerHeight || 800;
+        var y = 0;
+        var next = function () {
+            if (y < document.scrollingElement.scrollHeight) {
+                window.scrollTo(0, y);
+                y += step;
+                requestAnimationFrame(function () { setTimeout(next, 50); });
+                return;
+            }
+            window.scrollTo(0, 0);
+            var pending = Array.from(document.images).filter(function (img) {
+                return !img.complete;
+            }).map(function (img) {
+                return img.decode().catch(function () {});
+            });
+            Promise.race([
+                Promise.all(pending),
+                new Promise(function (r) { setTimeout(r, timeoutMs); })
+            ]).then(function () { resolve(pending.length); });
+        };
+        next();
+    });
+"""
+
+# Chrome can't capture a surface taller than this in one screenshot
+FULL_PAGE_MAX_HEIGHT = 16384
+
+# Placeholder nodes the reader shows while a section is still loading
+LOADING_SELECTOR = '[aria-busy="true"], [class*="skeleton" i]'
+
+# contentSignature(el): cheap fingerprint of a content area's text
+CONTENT_SIGNATURE_FN = """
+    function contentSignature(el) {
+        var text = el.textContent;
+        return text.length + ':' + text.slice(0, 300);
+    }
+"""
+
+# Remember the current content area (for the selectors in arguments[0]) and its
+# text, so NAV_READY_JS can tell when the reader has swapped in another section
+MARK_SECTION_JS = FIND_CONTENT_FN + CONTENT_SIGNATURE_FN + """
+    var el = findContent(arguments[0]);
+    window.__scraperNav = {node: el, sig: el ? contentSignature(el) : null};
+"""
+
+# True once the section has changed, finished loading, and no loading placeholders
+# (arguments[1]) are visible inside the content area (arguments[2] are its selectors;
+# the whole page if none matches). arguments[0] is the URL before clicking, or null
+# when no change is expected. Any one signal counts as changed: a different URL,
+# a new document, or a replaced or rewritten content area (see MARK_SECTION_JS).
+NAV_READY_JS = FIND_CONTENT_FN + CONTENT_SIGNATURE_FN + """
+    var content = findContent(arguments[2]);
+    var nav = window.__scraperNav;
+    if (arguments[0] && nav) {
+        if (nav.node && !content) return false;
+        var changed = window.location.href !== arguments[0]
+            || (content && (content !== nav.node || contentSignature(content) !== nav.sig));
+        if (!changed) return false;
+    }
+    if (document.readyState !== 'complete') return false;
+    var root = content || document;
+    var loading = Array.from(root.querySelectorAll(arguments[1])).some(function (el) {
+        return el.offsetParent !== null;
+    });
+    if (loading) return false;
+    return (""" + IMAGES_READY_EXPR + ");"
+
+# Hint the browser to fetch arguments[0] into its HTTP cache at low priority
+PREFETCH_JS = """
+    var href = arguments[0];
+    if (document.querySelector('link[rel="prefetch"][href="' + CSS.escape(href) + '"]')) return;
+    var link = document.createElement('link');
+    link.rel = 'prefetch';
+    link.href = href;
+    document.head.appendChild(link);
+"""
+
+# First visible element matching arguments[0], or null
+FIRST_VISIBLE_JS = """
+    return Array.from(document.querySelectorAll(arguments[0])).find(function (el) {
+        return el.offsetParent !== null;
+    }) || null;
+"""
+
+# First line of the first element matching arguments[0] whose text contains "Ch"
+# (the expanded chapter in the table of contents), or null
+CHAPTER_TITLE_JS = """
+    var items = document.querySelectorAll(arguments[0]);
+    for (var i = 0; i < items.length; i++) {
+        var line = items[i].innerText.trim().split('\\n')[0];
+        if (line && line.indexOf('Ch') !== -1) return line;
+    }
+    return null;
+"""
+
+# Text and href of every visible element matching arguments[0]
+VISIBLE_LINKS_JS = """
+    return Array.from(document.querySelectorAll(arguments[0])).filter(function (a) {
+        return a.offsetParent !== null;
+    }).map(function (a) {
+        return {text: a.innerText.trim(), href: a.href};
+    });
+"""
+
+# Text and href of the visible links beside each selected/active item matching arguments[0]
+SELECTED_SIBLING_LINKS_JS = """
+    var links = [];
+    Array.from(document.querySelectorAll(arguments[0])).forEach(function (item) {
+        if (!item.parentElement) return;
+        Array.from(item.parentElement.querySelectorAll('a')).forEach(function (a) {
+            if (a.offsetParent !== null) links.push({text: a.innerText.trim(), href: a.href});
+        });
+    });
+    return links;
+"""
+
+
+# Errors a wait retries on: the element isn't there (yet) or the page changed under
+# the command. Anything else (closed window, dead session) is raised at once.
+_TRANSIENT_ERRORS = (NoSuchElementException, StaleElementReferenceException, JavascriptException)
+
+# Polling intervals for waits, in ms: start short, back off while nothing happens
+POLL_BACKOFF_MS = [50, 100, 200, 400, 800, 1500]
+
+
+def _poll_backoff():
+    """Yield poll delays in seconds along POLL_BACKOFF_MS, capped at TIMEOUTS["poll_max"], forever."""
+    cap = config.TIMEOUTS["poll_max"]
+    for ms in POLL_BACKOFF_MS:
+        yield min(ms / 1000, cap)
+    while True:
+        yield min(POLL_BACKOFF_MS[-1] / 1000, cap)
+
+
+# ChromeDriver session attached to the user's Chrome, shared by every EbookScraper
+# in this process (created on first connect, never quit: the browser is the user's)
+_driver = None
 
 
 class EbookScraper:
@@ -31,12 +308,35 @@ class EbookScraper:
 
     def __init__(self):
         self.driver = None
+        self._run_ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._img_counter = itertools.count(1)
+        self._ocr_pool = None
+        self._ocr_futures = []
+        # Screenshot files are written by a background thread while the driver moves on
+        self._io_q = queue.Queue()
+        self._io_failed = set()  # paths whose write failed; filled by the writer thread
+        self._io_thread = threading.Thread(target=self._io_worker, daemon=True)
+        self._io_thread.start()
         self.screenshots = []
         self.chapter_title = ""
         self.section_titles = []
 
     def connect_to_browser(self):
-        """Connect to an existing Chrome browser with remote debugging enabled."""
+        """
+        Connect to an existing Chrome browser with remote debugging enabled.
+        The ChromeDriver session is shared process-wide, so later scrapes reuse it.
+        """
+        global _driver
+        
+        if _driver is not None:
+            try:
+                # Still attached? Then skip starting a new ChromeDriver
+                print(f"Reusing browser session. Current URL: {_driver.current_url}")
+                self.driver = _driver
+                return True
+            except Exception:
+                _driver = None
+        
         print(f"Connecting to Chrome at {config.CHROME_DEBUG_HOST}:{config.CHROME_DEBUG_PORT}...")
         
         chrome_options = Options()
@@ -46,51 +346,115 @@ class EbookScraper:
         )
         
         try:
-            self.driver = webdriver.Chrome(options=chrome_options)
+            self.driver = _driver = webdriver.Chrome(options=chrome_options)
             print(f"Connected! Current URL: {self.driver.current_url}")
             print(f"Page title: {self.driver.title}")
             return True
         except Exception as e:
             print(f"Failed to connect to Chrome: {e}")
+            if config.LAUNCH_MODE:
+                return self._launch_browser()
             print("\nMake sure Chrome is running with remote debugging enabled:")
             print('  chrome.exe --remote-debugging-port=9222')
             return False
 
+    def _launch_browser(self):
+        """
+        Start a new Chrome set up for scraping (see LAUNCH_SETTINGS) and wait for the
+        user to log in. It listens on the debug port, so later runs attach to it.
+        """
+        global _driver
+        settings = config.LAUNCH_SETTINGS
+        print("Launching a new Chrome...")
+
+        chrome_options = Options()
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--disable-extensions")
+        chrome_options.add_argument(f"--window-size={settings['window_size'][0]},{settings['window_size'][1]}")
+        chrome_options.add_argument(f"--remote-debugging-port={config.CHROME_DEBUG_PORT}")
+        # Keep Chrome open when ChromeDriver stops at exit, so later runs can attach
+        chrome_options.add_experimental_option("detach", True)
+        if settings["user_data_dir"]:
+            chrome_options.add_argument(f"--user-data-dir={settings['user_data_dir']}")
+        # Return from navigations at DOMContentLoaded; NAV_READY_JS waits for the rest
+        chrome_options.page_load_strategy = "eager"
+
+        try:
+            self.driver = _driver = webdriver.Chrome(options=chrome_options)
+        except Exception as e:
+            print(f"Failed to launch Chrome: {e}")
+            return False
+
+        input("Log in, open the e-book and expand the chapter, then press Enter...")
+        print(f"Launched! Current URL: {self.driver.current_url}")
+        return True
+
     def wait_for_element(self, selector, timeout=None, by=By.CSS_SELECTOR):
         """Wait for an element to be present and return it."""
         timeout = timeout or config.TIMEOUTS["element_wait"]
-        try:
-            element = WebDriverWait(self.driver, timeout).until(
-                EC.presence_of_element_located((by, selector))
-            )
-            return element
-        except TimeoutException:
-            return None
+        return self._wait_for(EC.presence_of_element_located((by, selector)), timeout)
 
     def wait_for_clickable(self, selector, timeout=None, by=By.CSS_SELECTOR):
         """Wait for an element to be clickable and return it."""
         timeout = timeout or config.TIMEOUTS["element_wait"]
+        return self._wait_for(EC.element_to_be_clickable((by, selector)), timeout)
+
+    def _wait_for(self, condition, timeout):
+        """
+        Call condition(driver) until it returns something truthy and return that, or
+        None on timeout. Polls on _poll_backoff(), so quick events are seen quickly.
+        _TRANSIENT_ERRORS count as "not yet"; any other error is raised.
+        """
+        deadline = time.monotonic() + timeout
+        for delay in _poll_backoff():
+            try:
+                result = condition(self.driver)
+                if result:
+                    return result
+            except _TRANSIENT_ERRORS:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(delay, remaining))
+
+    def _wait_js(self, js, *args, timeout=5.0):
+        """Poll a JS predicate until it returns something truthy; returns None on timeout."""
+        return self._wait_for(lambda d: d.execute_script(js, *args), timeout)
+
+    def _cdp_wait(self, js, *args, timeout=5.0):
+        """
+        Wait for a JS predicate (same form as for _wait_js) without polling: the page
+        re-checks it on DOM and load events and answers through an awaited promise.
+        Falls back to polling if the document is replaced while waiting.
+        """
+        predicate = f"(function () {{ {js} }}).apply(null, {json.dumps(list(args))})"
         try:
-            element = WebDriverWait(self.driver, timeout).until(
-                EC.element_to_be_clickable((by, selector))
-            )
-            return element
-        except TimeoutException:
-            return None
+            result = self.driver.execute_cdp_cmd("Runtime.evaluate", {
+                "expression": CDP_WAIT_JS % {"predicate": predicate, "timeout_ms": int(timeout * 1000)},
+                "awaitPromise": True,
+                "returnByValue": True,
+            })
+            if "exceptionDetails" not in result:
+                return bool(result["result"].get("value"))
+        except Exception:
+            pass
+        return self._wait_js(js, *args, timeout=timeout)
 
     def dismiss_navigation_instructions(self):
         """Dismiss the navigation instructions popup if present."""
         try:
-            close_buttons = self.driver.find_elements(
-                By.CSS_SELECTOR, 
+            # One script finds a visible close button; usually there is none and
+            # that single round-trip is all this costs
+            btn = self.driver.execute_script(
+                FIRST_VISIBLE_JS,
                 config.SELECTORS["nav_instructions_close"]
             )
-            for btn in close_buttons:
-                if btn.is_displayed():
-                    btn.click()
-                    time.sleep(0.5)
-                    print("Dismissed navigation instructions popup")
-                    break
+            if btn:
+                btn.click()
+                time.sleep(0.5)
+                print("Dismissed navigation instructions popup")
         except Exception:
             pass  # Popup not present or already dismissed
 
@@ -103,68 +467,43 @@ class EbookScraper:
         chapter_title = "Chapter"
         
         try:
-            # Look for expanded chapter items
-            expanded_items = self.driver.find_elements(
-                By.CSS_SELECTOR, 
-                '[aria-expanded="true"]'
-            )
-            
-            for item in expanded_items:
-                # Get chapter title
-                try:
-                    title_text = item.text.strip().split('\n')[0]
-                    if title_text and 'Ch' in title_text:
-                        chapter_title = title_text
-                        break
-                except Exception:
-                    continue
+            # Chapter title from the expanded chapter items, in one round-trip
+            title_text = self.driver.execute_script(CHAPTER_TITLE_JS, '[aria-expanded="true"]')
+            if title_text:
+                chapter_title = title_text
             
             # Find all section links within the table of contents
-            # Look for links that appear to be sections (nested under chapters)
-            all_links = self.driver.find_elements(By.CSS_SELECTOR, 'a[href*="/e-book"]')
+            # Look for links that appear to be sections (nested under chapters);
+            # one script returns text and href of every visible link
+            all_links = self.driver.execute_script(VISIBLE_LINKS_JS, 'a[href*="/e-book"]')
             
-            # Filter to only visible links that look like chapter sections
+            # Filter to links that look like chapter sections
             for link in all_links:
-                try:
-                    if link.is_displayed():
-                        text = link.text.strip()
-                        href = link.get_attribute('href')
-                        
-                        # Check if this looks like a section link (has section number pattern)
-                        if text and href:
-                            # Match patterns like "4.1", "Ch 4 Introduction", etc.
-                            if re.match(r'^\d+\.\d+', text) or 'Introduction' in text:
-                                sections.append({
-                                    'title': text,
-                                    'href': href,
-                                    'element': link
-                                })
-                except StaleElementReferenceException:
-                    continue
+                text = link['text']
+                href = link['href']
+                
+                # Check if this looks like a section link (has section number pattern)
+                if text and href:
+                    # Match patterns like "4.1", "Ch 4 Introduction", etc.
+                    if _SECTION_RE.match(text) or 'Introduction' in text:
+                        sections.append({
+                            'title': text,
+                            'href': href,
+                        })
             
             # If we couldn't find sections with the pattern, look for selected item and siblings
             if not sections:
-                # Find currently selected/active link
-                selected = self.driver.find_elements(
-                    By.CSS_SELECTOR, 
+                # Links next to the currently selected/active item
+                sibling_links = self.driver.execute_script(
+                    SELECTED_SIBLING_LINKS_JS,
                     '[aria-selected="true"], [class*="selected"], [class*="active"]'
                 )
-                for item in selected:
-                    try:
-                        parent = item.find_element(By.XPATH, '..')
-                        sibling_links = parent.find_elements(By.CSS_SELECTOR, 'a')
-                        for link in sibling_links:
-                            if link.is_displayed():
-                                text = link.text.strip()
-                                href = link.get_attribute('href')
-                                if text and href:
-                                    sections.append({
-                                        'title': text,
-                                        'href': href,
-                                        'element': link
-                                    })
-                    except Exception:
-                        continue
+                for link in sibling_links:
+                    if link['text'] and link['href']:
+                        sections.append({
+                            'title': link['text'],
+                            'href': link['href'],
+                        })
                         
         except Exception as e:
             print(f"Error analyzing chapter structure: {e}")
@@ -179,82 +518,72 @@ class EbookScraper:
         return sections
 
     def capture_page_screenshots(self, section_title):
-        """Capture screenshots of the current page content by scrolling."""
+        """Capture the current page content in one full-page shot, or by scrolling."""
         print(f"  Capturing: {section_title}")
         screenshots = []
         
-        time.sleep(config.TIMEOUTS["after_click"])
-        
-        # Try to find the main content area
-        content_selectors = [
-            '[class*="EbookContent"]',
-            '[class*="ebook-content"]',
-            '[class*="PageContent"]',
-            '[class*="page-content"]',
-            'main',
-            'article',
-            '[role="main"]',
-            '.content',
-        ]
-        
-        content_area = None
-        for selector in content_selectors:
-            try:
-                elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                for el in elements:
-                    if el.is_displayed() and el.size['height'] > 100:
-                        content_area = el
-                        break
-                if content_area:
-                    break
-            except Exception:
-                continue
+        # Wait until the section has rendered instead of a fixed delay
+        if not self._wait_js(NAV_READY_JS, None, LOADING_SELECTOR, CONTENT_SELECTORS,
+                             timeout=config.TIMEOUTS["after_click"]):
+            print("    Page still loading, capturing anyway")
+        
+        # Try to find the main content area (selectors in priority order, one round-trip)
+        try:
+            content_area = self.driver.execute_script(FIND_CONTENT_JS, CONTENT_SELECTORS)
+        except Exception:
+            content_area = None
         
         if not content_area:
             # Fall back to taking full page screenshot
             print("    Using full page screenshot mode")
             content_area = self.driver.find_element(By.TAG_NAME, 'body')
         
-        # Get the scrollable container and its dimensions
+        # Get the scrollable container and its dimensions in one call
         try:
-            scroll_height = self.driver.execute_script(
-                "return arguments[0].scrollHeight", content_area
-            )
-            client_height = self.driver.execute_script(
-                "return arguments[0].clientHeight", content_area
-            )
+            metrics = self.driver.execute_script(CONTENT_METRICS_JS, content_area)
         except Exception:
             # Use window scrolling
-            scroll_height = self.driver.execute_script("return document.body.scrollHeight")
-            client_height = self.driver.execute_script("return window.innerHeight")
+            metrics = self.driver.execute_script(CONTENT_METRICS_JS, None)
+        scroll_height = metrics['h']
+        client_height = metrics['vh']
         
         # Calculate number of screenshots needed
         viewport_height = client_height or 800
         num_screenshots = max(1, (scroll_height // viewport_height) + 1)
         
         print(f"    Content height: {scroll_height}px, viewport: {viewport_height}px")
+        
+        # Content that scrolls with the window can be captured in one shot without
+        # scrolling; inner scroll containers still need the scroll loop below
+        if not metrics.get('inner'):
+            screenshot_data = self._capture_full_page()
+            if screenshot_data:
+                filepath, filename = self._save_screenshot(screenshot_data, section_title)
+                screenshots.append({
+                    'path': filepath,
+                    'section': section_title,
+                    'index': 0,
+                    'scroll_pos': 0,
+                })
+                print(f"    Saved full page: {filename}")
+                return screenshots
+        
         print(f"    Taking {num_screenshots} screenshot(s)")
         
-        # Scroll to top first
-        self.driver.execute_script("window.scrollTo(0, 0)")
-        time.sleep(config.TIMEOUTS["scroll_delay"])
+        # Scroll the content area itself when it has its own scrollbar, else the window
+        scroller = content_area if metrics.get('inner') else None
         
         for i in range(num_screenshots):
-            # Scroll to position
+            # Scroll to position (the first one is the top) and wait for it to land and
+            # its images to load; the same script returns the metrics for the bottom check
             scroll_pos = i * viewport_height
-            self.driver.execute_script(f"window.scrollTo(0, {scroll_pos})")
-            time.sleep(config.TIMEOUTS["scroll_delay"])
+            position = self.driver.execute_script(SCROLL_TO_JS, scroller, scroll_pos)
+            if not position:
+                position = self._wait_js(SCROLL_READY_JS, scroller, scroll_pos)
             
             # Take screenshot
-            screenshot_data = self.driver.get_screenshot_as_png()
-            img = Image.open(io.BytesIO(screenshot_data))
-            
-            # Save screenshot
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            safe_title = re.sub(r'[^\w\s-]', '', section_title)[:30]
-            filename = f"{safe_title}_{i+1}_{timestamp}.png"
-            filepath = os.path.join(config.SCREENSHOT_FOLDER, filename)
-            img.save(filepath)
+            screenshot_data = self._capture_viewport()
+            filepath, filename = self._save_screenshot(screenshot_data, section_title)
             
             screenshots.append({
                 'path': filepath,
@@ -266,41 +595,207 @@ class EbookScraper:
             print(f"    Saved: {filename}")
             
             # Check if we've reached the bottom
-            current_scroll = self.driver.execute_script("return window.pageYOffset")
-            max_scroll = self.driver.execute_script(
-                "return document.body.scrollHeight - window.innerHeight"
-            )
-            if current_scroll >= max_scroll:
+            if position and position['y'] >= position['max']:
                 break
         
         # Scroll back to top
-        self.driver.execute_script("window.scrollTo(0, 0)")
+        self.driver.execute_script("(arguments[0] || document.scrollingElement).scrollTop = 0;", scroller)
         
         return screenshots
 
+    def _screenshot_params(self):
+        """Page.captureScreenshot params for the configured screenshot format."""
+        if config.SCREENSHOT_SETTINGS["format"] == "jpeg":
+            # Lossy is fine for OCR and much smaller than PNG; Chrome encodes it directly
+            return {"format": "jpeg", "quality": config.SCREENSHOT_SETTINGS["quality"]}
+        return {"format": "png"}
+
+    def _capture_viewport(self):
+        """Capture the current viewport in the configured format; returns the encoded bytes."""
+        result = self.driver.execute_cdp_cmd("Page.captureScreenshot", self._screenshot_params())
+        return base64.b64decode(result["data"])
+
+    def _load_lazy_content(self):
+        """Make below-the-fold lazy images and content load before a full-page capture."""
+        try:
+            self.driver.execute_script(LOAD_LAZY_CONTENT_JS, int(config.TIMEOUTS["element_wait"] * 1000))
+        except Exception as e:
+            print(f"    Could not preload lazy content: {e}")
+
+    def _content_size(self):
+        """Size of the whole document in CSS pixels, from Page.getLayoutMetrics."""
+        layout = self.driver.execute_cdp_cmd("Page.getLayoutMetrics", {})
+        return layout.get("cssContentSize") or layout["contentSize"]
+
+    def _capture_full_page(self):
+        """
+        Capture the whole document in one CDP screenshot (no scrolling).
+        Returns the encoded bytes, or None if the page is too tall or the capture fails.
+        """
+        try:
+            # The size limit is in device pixels, the layout metrics in CSS pixels
+            dpr = self.driver.execute_script("return window.devicePixelRatio") or 1
+            content = self._content_size()
+            if content["height"] * dpr > FULL_PAGE_MAX_HEIGHT:
+                return None
+            
+            # Only worth it once the one-shot capture is going to be taken;
+            # loaded content can make the page taller, so measure again
+            self._load_lazy_content()
+            content = self._content_size()
+            if content["height"] * dpr > FULL_PAGE_MAX_HEIGHT:
+                return None
+            
+            params = self._screenshot_params()
+            params.update({
+                "captureBeyondViewport": True,
+                "fromSurface": True,
+                "clip": {
+                    "x": 0,
+                    "y": 0,
+                    "width": content["width"],
+                    "height": content["height"],
+                    "scale": 1,
+                },
+            })
+            result = self.driver.execute_cdp_cmd("Page.captureScreenshot", params)
+            return base64.b64decode(result["data"])
+        except Exception as e:
+            print(f"    Full page capture failed, scrolling instead: {e}")
+            return None
+
+    def _save_screenshot(self, screenshot_data, section_title):
+        """Write already-encoded screenshot bytes to disk as-is; returns (filepath, filename)."""
+        safe_title = _SAFE_NAME_RE.sub('', section_title)[:30]
+        ext = "jpg" if config.SCREENSHOT_SETTINGS["format"] == "jpeg" else "png"
+        # Run timestamp plus a running counter: unique even within the same second
+        filename = f"{safe_title}_{next(self._img_counter):04d}_{self._run_ts}.{ext}"
+        filepath = os.path.join(config.SCREENSHOT_FOLDER, filename)
+        self._io_q.put((filepath, screenshot_data))
+        
+        return filepath, filename
+
+    def _io_worker(self):
+        """Write queued (filepath, data) screenshots to disk until a None sentinel arrives."""
+        while True:
+            item = self._io_q.get()
+            try:
+                if item is None:
+                    return
+                filepath, data = item
+                with open(filepath, 'wb') as f:
+                    f.write(data)
+            except Exception as e:
+                self._io_failed.add(filepath)
+                print(f"    Failed to write screenshot: {e}")
+            finally:
+                self._io_q.task_done()
+
     def navigate_to_section(self, section):
         """Navigate to a section by clicking its link."""
         try:
             # Re-find the element to avoid stale reference
             link = self.driver.find_element(By.CSS_SELECTOR, f'a[href="{section["href"]}"]')
+            previous_url = self.driver.current_url
+            self.driver.execute_script(MARK_SECTION_JS, CONTENT_SELECTORS)
             
             # Scroll element into view and click
             self.driver.execute_script("arguments[0].scrollIntoView(true);", link)
-            time.sleep(0.3)
-            
             link.click()
-            time.sleep(config.TIMEOUTS["after_click"])
             
             # Wait for content to load
-            WebDriverWait(self.driver, config.TIMEOUTS["page_load"]).until(
-                lambda d: d.execute_script("return document.readyState") == "complete"
-            )
+            if not self._wait_for(
+                lambda d: d.execute_script("return document.readyState") == "complete",
+                config.TIMEOUTS["page_load"]
+            ):
+                raise TimeoutException("page did not finish loading")
+            
+            # Wait for the new section to replace the old one (skipped if we were already on it)
+            if previous_url == section["href"]:
+                previous_url = None
+            if not self._cdp_wait(NAV_READY_JS, previous_url, LOADING_SELECTOR, CONTENT_SELECTORS,
+                                  timeout=config.TIMEOUTS["page_load"]):
+                print(f"  Section not ready after {config.TIMEOUTS['page_load']}s, continuing anyway")
             
             return True
         except Exception as e:
             print(f"  Failed to navigate to section: {e}")
             return False
 
+    def _prefetch(self, href):
+        """Ask the current page to prefetch a URL; failures are harmless and ignored."""
+        try:
+            self.driver.execute_script(PREFETCH_JS, href)
+        except Exception:
+            pass
+
+    def _start_tab_load(self, handle, section):
+        """Switch to a tab and start loading a section's URL there without waiting for it."""
+        self.driver.switch_to.window(handle)
+        self.driver.execute_script(TAB_LOAD_JS, section["href"])
+
+    def scrape_sections_in_tabs(self, sections, tab_count):
+        """
+        Capture sections in order while the following ones load in other tabs.
+        
+        WebDriver handles one command at a time, so the tabs are visited
+        round-robin from this thread: page loads overlap, commands don't.
+        """
+        main_handle = self.driver.current_window_handle
+        original_url = self.driver.current_url
+        handles = [main_handle]
+        
+        try:
+            for _ in range(min(tab_count, len(sections)) - 1):
+                self.driver.switch_to.new_window('tab')
+                handles.append(self.driver.current_window_handle)
+            
+            for handle, section in zip(handles, sections):
+                self._start_tab_load(handle, section)
+            
+            for i, section in enumerate(sections):
+                print(f"\n[{i+1}/{len(sections)}] {section['title']}")
+                handle = handles[i % len(handles)]
+                
+                # Bring the tab to the front so it renders, then wait for its load to finish
+                self.driver.switch_to.window(handle)
+                self.driver.execute_cdp_cmd("Page.bringToFront", {})
+                loaded = self._wait_js(TAB_LOADED_JS, timeout=config.TIMEOUTS["page_load"])
+                if not loaded:
+                    # Load it once more, this time waiting for it
+                    print(f"  Page did not finish loading, retrying")
+                    try:
+                        self.driver.get(section['href'])
+                        loaded = True
+                    except Exception as e:
+                        print(f"  Reload failed: {e}")
+                if loaded:
+                    self.dismiss_navigation_instructions()
+                    screenshots = self.capture_page_screenshots(section['title'])
+                    self.add_section(section['title'], screenshots)
+                else:
+                    print(f"  Skipping section, page did not finish loading")
+                
+                # Reuse this tab for the section that is a full round ahead
+                upcoming = i + len(handles)
+                if upcoming < len(sections):
+                    self._start_tab_load(handle, sections[upcoming])
+        finally:
+            # Close the extra tabs; the user's own tab stays open
+            for handle in handles[1:]:
+                try:
+                    self.driver.switch_to.window(handle)
+                    self.driver.close()
+                except Exception:
+                    pass
+            self.driver.switch_to.window(main_handle)
+            # The user's tab was used for sections too; put it back where it was
+            try:
+                if self.driver.current_url != original_url:
+                    self.driver.get(original_url)
+            except Exception as e:
+                print(f"  Could not return to {original_url}: {e}")
+
     def scrape_chapter(self):
         """Main method to scrape an entire chapter."""
         print("\n" + "=" * 60)
@@ -328,8 +823,11 @@ class EbookScraper:
             current_url = self.driver.current_url
             section_title = self.driver.title or "Page"
             screenshots = self.capture_page_screenshots(section_title)
-            self.screenshots.extend(screenshots)
-            self.section_titles.append(section_title)
+            self.add_section(section_title, screenshots)
+        elif config.PARALLEL_TABS > 1 and len(sections) > 1:
+            # Load upcoming sections in extra tabs while the current one is captured
+            print(f"\nStarting to scrape {len(sections)} sections using {config.PARALLEL_TABS} tabs...")
+            self.scrape_sections_in_tabs(sections, config.PARALLEL_TABS)
         else:
             # Navigate through each section and capture
             print(f"\nStarting to scrape {len(sections)} sections...")
@@ -339,10 +837,13 @@ class EbookScraper:
                 
                 # Navigate to section
                 if self.navigate_to_section(section):
+                    # Let the next section download while this one is captured
+                    if i + 1 < len(sections):
+                        self._prefetch(sections[i + 1]['href'])
+                    
                     # Capture screenshots
                     screenshots = self.capture_page_screenshots(section['title'])
-                    self.screenshots.extend(screenshots)
-                    self.section_titles.append(section['title'])
+                    self.add_section(section['title'], screenshots)
                 else:
                     print(f"  Skipping section due to navigation error")
         
@@ -352,14 +853,14 @@ class EbookScraper:
             print("Generating PDF...")
             
             # Create safe filename
-            safe_chapter = re.sub(r'[^\w\s-]', '', self.chapter_title)[:50]
+            safe_chapter = _SAFE_NAME_RE.sub('', self.chapter_title)[:50]
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             pdf_filename = f"{safe_chapter}_{timestamp}.pdf"
             pdf_path = os.path.join(config.OUTPUT_FOLDER, pdf_filename)
             
-            # Generate OCR-enabled PDF
+            # Generate OCR-enabled PDF from the OCR already done during the scrape
             screenshot_paths = [s['path'] for s in self.screenshots]
-            create_ocr_pdf(screenshot_paths, pdf_path, self.chapter_title)
+            create_ocr_pdf(screenshot_paths, pdf_path, self.chapter_title, ocr_results=self.collect_ocr())
             
             print(f"\nSUCCESS! PDF saved to: {pdf_path}")
             print(f"Total screenshots: {len(self.screenshots)}")
@@ -370,30 +871,90 @@ class EbookScraper:
         
         return True
 
+    def add_section(self, section_title, screenshots):
+        """Record a captured section and queue its screenshots for OCR."""
+        # The files must be on disk before anything reads them; drop any that didn't make it
+        self._io_q.join()
+        if self._io_failed:
+            kept = [s for s in screenshots if s['path'] not in self._io_failed]
+            if len(kept) < len(screenshots):
+                print(f"  Dropped {len(screenshots) - len(kept)} screenshot(s) that could not be saved")
+            screenshots = kept
+        self.screenshots.extend(screenshots)
+        self.section_titles.append(section_title)
+        if screenshots:
+            if self._ocr_pool is None:
+                # OCR workers run alongside the scrape, one task per captured section;
+                # one core is left for Chrome, which is still rendering and capturing
+                workers = max(1, (os.cpu_count() or 2) - 1)
+                self._ocr_pool = ProcessPoolExecutor(max_workers=workers, initializer=setup_tesseract)
+            paths = [s['path'] for s in screenshots]
+            self._ocr_futures.append(self._ocr_pool.submit(get_ocr_data_batch, paths))
+
+    def collect_ocr(self):
+        """
+        Wait for the background OCR and return one result per screenshot, in order,
+        or None if it didn't run or failed (create_ocr_pdf then does the OCR itself).
+        """
+        if not self._ocr_pool:
+            return None
+        try:
+            ocr_results = []
+            for future in self._ocr_futures:
+                ocr_results.extend(future.result())
+        except Exception as e:
+            print(f"Background OCR failed, running OCR now: {e}")
+            return None
+        finally:
+            self._ocr_pool.shutdown(wait=False)
+            self._ocr_pool = None
+            self._ocr_futures = []
+        
+        if len(ocr_results) != len(self.screenshots):
+            return None
+        return ocr_results
+
     def close(self):
         """Clean up resources (but don't close the browser)."""
+        if self._io_thread.is_alive():
+            self._io_q.put(None)
+            self._io_thread.join()
+        if self._ocr_pool:
+            self._ocr_pool.shutdown(wait=False, cancel_futures=True)
+            self._ocr_pool = None
         # We don't close the browser since user may still need it
         self.driver = None
 
 
 def main():
-    """Main entry point."""
-    scraper = EbookScraper()
-    
-    try:
-        success = scraper.scrape_chapter()
-        if success:
-            print("\n✓ Scraping completed successfully!")
-        else:
-            print("\n✗ Scraping failed or incomplete")
-    except KeyboardInterrupt:
-        print("\n\nScraping interrupted by user")
-    except Exception as e:
-        print(f"\n✗ Error during scraping: {e}")
-        import traceback
-        traceback.print_exc()
-    finally:
-        scraper.close()
+    """Main entry point. Scrapes chapters one after another on the same browser session."""
+    while True:
+        scraper = EbookScraper()
+        
+        try:
+            success = scraper.scrape_chapter()
+            if success:
+                print("\n✓ Scraping completed successfully!")
+            else:
+                print("\n✗ Scraping failed or incomplete")
+        except KeyboardInterrupt:
+            print("\n\nScraping interrupted by user")
+            break
+        except Exception as e:
+            print(f"\n✗ Error during scraping: {e}")
+            import traceback
+            traceback.print_exc()
+        finally:
+            scraper.close()
+        
+        if _driver is None:
+            break
+        try:
+            response = input("\nExpand the next chapter in the sidebar and press Enter to scrape it (q to quit): ")
+        except (KeyboardInterrupt, EOFError):
+            break
+        if response.strip().lower() == 'q':
+            break
 
 
 if __name__ == "__main__":